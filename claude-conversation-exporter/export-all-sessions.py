@@ -12,16 +12,56 @@ Usage:
     python export-all-sessions.py --project wireless # Filter by project name
     python export-all-sessions.py --since 2024-01-01 # Filter by date
     python export-all-sessions.py --central ~/exports # Override central location
+    python export-all-sessions.py --jobs 4           # Limit parallel exports
 """
 
 import os
+import io
+import re
 import sys
 import json
-import glob
+import time
 import argparse
-import subprocess
+import importlib.util
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import namedtuple
+from functools import lru_cache, partial
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+# One discovered session transcript (lighter than a dict per session)
+Session = namedtuple('Session', [
+    'session_id',
+    'short_id',
+    'transcript_path',
+    'cwd',
+    'project_name',
+    'project_name_lower',
+    'project_folder',
+    'mtime',
+    'mtime_ns',
+    'file_size',
+])
+
+# Matches the first "timestamp" field in the head of a JSONL transcript
+TIMESTAMP_RE = re.compile(rb'"timestamp"\s*:\s*"([^"]+)"')
+
+# Bytes read from the start of a transcript when looking for its timestamp
+TIMESTAMP_SCAN_BYTES = 4096
+
+# Column layout and timestamp format for --list output
+LIST_ROW_FORMAT = '{:<12} {:<30} {:<20} {:<10} {:<10}'
+LIST_TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+# Seconds to wait for one session's export once it is next in line before
+# reporting it as timed out, so a pathological transcript cannot stall the batch
+EXPORT_TIMEOUT_SECONDS = 60
+
+# Records session_id -> [mtime_ns, size, exported_path] for past exports
+MANIFEST_PATH = Path.home() / ".claude" / ".export-manifest.json"
 
 
 def load_config():
@@ -44,6 +84,48 @@ def load_config():
     return default_config
 
 
+def load_manifest():
+    """Load the export manifest written by previous runs."""
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(manifest):
+    """Atomically write the export manifest."""
+    tmp_path = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".tmp")
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(tmp_path, MANIFEST_PATH)
+    except OSError as e:
+        print(f"Warning: Could not save export manifest: {e}", file=sys.stderr)
+
+
+def is_unchanged_since_export(session, manifest):
+    """Check whether the manifest shows this exact transcript was already exported."""
+    entry = manifest.get(session.session_id)
+    if not entry or len(entry) < 3:
+        return False
+    mtime_ns, size, exported_path = entry[:3]
+    return (mtime_ns == session.mtime_ns and size == session.file_size
+            and os.path.exists(exported_path))
+
+
+@lru_cache(maxsize=None)
+def list_dir_names(path):
+    """Return the entry names in a directory, or None if it can't be listed."""
+    try:
+        with os.scandir(path) as it:
+            return frozenset(entry.name for entry in it)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=None)
 def decode_project_path(encoded_name):
     """
     Convert encoded project folder name back to actual path.
@@ -66,14 +148,23 @@ def decode_project_path(encoded_name):
 
     while i < len(parts):
         # Try progressively longer combinations of remaining parts joined with dashes
-        # Start with longest possible to prefer paths with dashes in folder names
+        # Start with longest possible to prefer paths with dashes in folder names.
+        # Candidates are matched against one cached listing of the current
+        # directory rather than probing each with os.path.exists.
+        parent_path = '/' + '/'.join(result_parts)
+        children = list_dir_names(parent_path)
         found = False
 
         for j in range(len(parts), i, -1):
             candidate_segment = '-'.join(parts[i:j])
-            candidate_path = '/' + '/'.join(result_parts + [candidate_segment])
 
-            if os.path.exists(candidate_path):
+            if children is not None:
+                exists = candidate_segment in children
+            else:
+                # Directory not listable (e.g. no read permission); probe instead
+                exists = os.path.exists(os.path.join(parent_path, candidate_segment))
+
+            if exists:
                 result_parts.append(candidate_segment)
                 i = j
                 found = True
@@ -95,24 +186,97 @@ def get_session_modified_time(jsonl_path):
         return None
 
 
-def get_session_created_time(jsonl_path):
+def parse_iso_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp into an aware datetime.
+
+    Claude writes timestamps as YYYY-MM-DDTHH:MM:SS[.fff]Z, which is sliced
+    directly; anything else goes through datetime.fromisoformat.
+    """
+    if (len(value) >= 20 and value[-1] == 'Z' and value[10] == 'T'
+            and value[19] in '.Z' and value[4] == value[7] == '-'
+            and value[13] == value[16] == ':'):
+        try:
+            fraction = value[20:-1]
+            return datetime(
+                int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                int(fraction[:6].ljust(6, '0')) if fraction else 0,
+                tzinfo=timezone.utc,
+            )
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def get_session_created_time_from_jsonl(jsonl_path):
     """Get the creation time from the first entry in the JSONL file."""
     try:
-        with open(jsonl_path, 'r') as f:
-            first_line = f.readline()
+        # The first entry can carry a large payload, so look for the timestamp
+        # in a bounded read before falling back to parsing the whole line
+        with open(jsonl_path, 'rb') as f:
+            head = f.read(TIMESTAMP_SCAN_BYTES)
+            first_line = head.split(b'\n', 1)[0]
+            match = TIMESTAMP_RE.search(first_line)
+            if match:
+                return parse_iso_timestamp(match.group(1).decode())
+            if b'\n' not in head:
+                first_line += f.readline()
             if first_line:
                 data = json.loads(first_line)
                 if 'timestamp' in data:
-                    return datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00'))
+                    return parse_iso_timestamp(data['timestamp'])
     except:
         pass
     return get_session_modified_time(jsonl_path)
 
 
+# Session creation time defaults to the file mtime; opening every transcript
+# to read its first timestamp is opt-in via --use-jsonl-timestamps
+get_session_created_time = get_session_modified_time
+
+
+def scan_project(project_folder):
+    """Collect session info for every JSONL transcript in one project folder."""
+    sessions = []
+
+    # Decode the project path
+    project_path = decode_project_path(os.path.basename(project_folder))
+    project_name = Path(project_path).name
+    project_name_lower = project_name.lower()
+
+    # Find all JSONL files in this project, taking mtime and size
+    # from a single stat per file. Name checks come first so hidden and
+    # temporary files never cost a syscall.
+    with os.scandir(project_folder) as entries:
+        for entry in entries:
+            name = entry.name
+            if name[0] == '.' or not name.endswith('.jsonl') or not entry.is_file():
+                continue
+
+            session_id = name[:-len('.jsonl')]
+            st = entry.stat()
+
+            sessions.append(Session(
+                session_id=session_id,
+                short_id=session_id[:8] if len(session_id) > 8 else session_id,
+                transcript_path=entry.path,
+                cwd=project_path,
+                project_name=project_name,
+                project_name_lower=project_name_lower,
+                project_folder=project_folder,
+                mtime=st.st_mtime,
+                mtime_ns=st.st_mtime_ns,
+                file_size=st.st_size,
+            ))
+
+    return sessions
+
+
 def find_all_sessions(projects_dir):
     """
     Find all session files across all projects.
-    Returns list of dicts with session info.
+    Returns an unsorted list of Session records.
     """
     sessions = []
 
@@ -120,102 +284,163 @@ def find_all_sessions(projects_dir):
         print(f"Projects directory not found: {projects_dir}", file=sys.stderr)
         return sessions
 
-    for project_folder in projects_dir.iterdir():
-        if not project_folder.is_dir():
-            continue
+    with os.scandir(projects_dir) as projects:
+        project_folders = [entry.path for entry in projects if entry.is_dir()]
 
-        # Decode the project path
-        project_path = decode_project_path(project_folder.name)
-        project_name = Path(project_path).name
+    if not project_folders:
+        return sessions
 
-        # Find all JSONL files in this project
-        for jsonl_file in project_folder.glob("*.jsonl"):
-            session_id = jsonl_file.stem  # filename without extension
+    # Folder scans are dominated by stat/readdir latency, so overlap them
+    with ThreadPoolExecutor(max_workers=min(32, len(project_folders))) as executor:
+        for project_sessions in executor.map(scan_project, project_folders):
+            sessions.extend(project_sessions)
 
-            sessions.append({
-                'session_id': session_id,
-                'short_id': session_id[:8] if len(session_id) > 8 else session_id,
-                'transcript_path': str(jsonl_file),
-                'cwd': project_path,
-                'project_name': project_name,
-                'project_folder': str(project_folder),
-                'modified_time': get_session_modified_time(jsonl_file),
-                'file_size': jsonl_file.stat().st_size,
-            })
+    return sessions
 
-    # Sort by modified time, newest first
-    sessions.sort(key=lambda x: x['modified_time'] or datetime.min, reverse=True)
 
-    return sessions
+def session_sort_key(session):
+    """Sort key for newest-first ordering by modified time."""
+    return session.mtime
+
+
+@lru_cache(maxsize=None)
+def scan_export_dir(output_dir):
+    """
+    Index the HTML exports in a directory by session short ID.
 
+    Returns (by_prefix, by_suffix) dicts for the two filename formats:
+    {short_id}_{summary}.html and legacy {timestamp}_{short_id}.html.
+    """
+    by_prefix = {}
+    by_suffix = {}
+
+    try:
+        with os.scandir(output_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith('.') or not name.endswith('.html'):
+                    continue
+                stem = name[:-5]
+                head, sep, _ = stem.partition('_')
+                if not sep:
+                    continue
+                by_prefix.setdefault(head, entry.path)
+                by_suffix.setdefault(stem.rpartition('_')[2], entry.path)
+    except OSError:
+        pass
+
+    return by_prefix, by_suffix
+
+
+def index_central_exports(central_root):
+    """
+    Map (project_name, short_id) to the export path for every export under a
+    central export location.
+
+    All exports land in <central>/<project>/, so one pass over the tree
+    answers the existing-export check for every session up front.
+    """
+    exports = {}
+
+    try:
+        with os.scandir(central_root) as projects:
+            project_dirs = [(entry.name, entry.path) for entry in projects if entry.is_dir()]
+    except OSError:
+        return exports
+
+    for project_name, project_dir in project_dirs:
+        by_prefix, by_suffix = scan_export_dir(project_dir)
+        # {short_id}_{summary}.html wins over the legacy format, as in
+        # check_existing_export
+        for short_id, path in by_suffix.items():
+            exports[(project_name, short_id)] = path
+        for short_id, path in by_prefix.items():
+            exports[(project_name, short_id)] = path
+
+    return exports
+
+
+def check_existing_export(session, config, central_location=None, central_index=None):
+    """
+    Check if a session has already been exported.
+
+    Returns the path of the existing export, or None. central_index is the
+    dict from index_central_exports(); when given, the check is a dict lookup
+    instead of a per-project directory scan.
+    """
+    short_id = session.short_id
 
-def check_existing_export(session, config, central_location=None):
-    """Check if a session has already been exported."""
-    short_id = session['short_id']
+    if central_index is not None:
+        return central_index.get((session.project_name, short_id))
 
-    # Determine output directory
+    # Determine output directory (plain strings; this runs once per session)
     if central_location:
-        output_dir = Path(central_location) / session['project_name']
+        output_dir = os.path.join(os.path.expanduser(central_location), session.project_name)
     elif config.get('central_export_location'):
-        output_dir = Path(config['central_export_location']) / session['project_name']
+        output_dir = os.path.join(os.path.expanduser(config['central_export_location']), session.project_name)
     else:
-        output_dir = Path(session['cwd']) / config.get('output_dir', 'artifacts/conversations')
+        output_dir = os.path.join(session.cwd, config.get('output_dir', 'artifacts/conversations'))
 
-    if not output_dir.exists():
-        return None
+    # Check both filename formats against a single listing of the directory
+    by_prefix, by_suffix = scan_export_dir(output_dir)
+    return by_prefix.get(short_id) or by_suffix.get(short_id)
+
+
+# export-conversation.py module, loaded once per worker process
+_exporter = None
 
-    # Check both filename formats
-    patterns = [
-        str(output_dir / f"{short_id}_*.html"),
-        str(output_dir / f"*_{short_id}.html"),
-    ]
 
-    for pattern in patterns:
-        matches = glob.glob(pattern)
-        if matches:
-            return matches[0]
+def load_exporter(export_script_path):
+    """Import the export script as a module so sessions can be exported in-process."""
+    global _exporter
 
-    return None
+    spec = importlib.util.spec_from_file_location("export_conversation", export_script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _exporter = module
 
 
-def export_session(session, export_script_path, dry_run=False):
-    """Export a single session using the export script."""
+def export_session(session, dry_run=False):
+    """Export a single session using the loaded export script."""
     hook_input = {
-        'session_id': session['session_id'],
-        'transcript_path': session['transcript_path'],
-        'cwd': session['cwd'],
+        'session_id': session.session_id,
+        'transcript_path': session.transcript_path,
+        'cwd': session.cwd,
     }
 
     if dry_run:
-        return True, "Dry run - would export"
+        return True, "Dry run - would export", None
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
 
     try:
-        result = subprocess.run(
-            [sys.executable, str(export_script_path)],
-            input=json.dumps(hook_input),
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
-
-        if result.returncode == 0:
-            return True, result.stdout.strip()
-        else:
-            return False, result.stderr.strip() or "Unknown error"
-
-    except subprocess.TimeoutExpired:
-        return False, "Export timed out"
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exported_path = _exporter.process_session(hook_input)
     except Exception as e:
-        return False, str(e)
+        return False, stderr.getvalue().strip() or str(e), None
+
+    return True, stdout.getvalue().strip(), exported_path
+
+
+def terminate_pool_workers(executor):
+    """Stop a process pool's own worker processes so shutdown() cannot hang on them."""
+    # ProcessPoolExecutor has no public handle on its workers
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 
 def format_size(size_bytes):
     """Format file size in human-readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} TB"
+    # Each unit is 2**10 of the previous one, so the unit index falls
+    # straight out of the bit length instead of a divide-and-compare loop
+    if size_bytes <= 0:
+        return f"{size_bytes:.1f} B"
+    shift = min((size_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (shift * 10)):.1f} {SIZE_UNITS[shift]}"
 
 
 def main():
@@ -231,6 +456,7 @@ Examples:
   python export-all-sessions.py --since 2024-01-01   # Only sessions after date
   python export-all-sessions.py --list               # Just list sessions, don't export
   python export-all-sessions.py --central ~/exports  # Export all to central location
+  python export-all-sessions.py --jobs 4             # Run at most 4 exports at once
         """
     )
 
@@ -250,6 +476,11 @@ Examples:
                         help='Override central export location')
     parser.add_argument('--verbose', '-v', action='store_true',
                         help='Show detailed output')
+    parser.add_argument('--use-jsonl-timestamps', action='store_true',
+                        help='Filter and sort by the start time recorded in each transcript '
+                             'instead of file modification time (reads every transcript)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Number of sessions to export in parallel (default: CPU count)')
 
     args = parser.parse_args()
 
@@ -277,47 +508,80 @@ Examples:
         print("No sessions found.")
         sys.exit(0)
 
+    if args.use_jsonl_timestamps:
+        # Swap each session's mtime for its recorded start time so the date
+        # filters, sorting and listing below all use it
+        for i, session in enumerate(sessions):
+            created = get_session_created_time_from_jsonl(session.transcript_path)
+            if created:
+                sessions[i] = session._replace(mtime=created.timestamp())
+
     # Apply filters
     if args.project:
-        sessions = [s for s in sessions if args.project.lower() in s['project_name'].lower()]
+        needle = args.project.lower()
+        sessions = [s for s in sessions if needle in s.project_name_lower]
 
+    # Date bounds are converted to POSIX timestamps once so each session is
+    # checked with a plain float comparison against its mtime
     if args.since:
         try:
-            since_date = datetime.strptime(args.since, '%Y-%m-%d')
-            sessions = [s for s in sessions if s['modified_time'] and s['modified_time'] >= since_date]
+            since_ts = datetime.strptime(args.since, '%Y-%m-%d').timestamp()
+            sessions = [s for s in sessions if s.mtime >= since_ts]
         except ValueError:
             print(f"Invalid date format: {args.since}. Use YYYY-MM-DD", file=sys.stderr)
             sys.exit(1)
 
     if args.before:
         try:
-            before_date = datetime.strptime(args.before, '%Y-%m-%d')
-            sessions = [s for s in sessions if s['modified_time'] and s['modified_time'] < before_date]
+            before_ts = datetime.strptime(args.before, '%Y-%m-%d').timestamp()
+            sessions = [s for s in sessions if s.mtime < before_ts]
         except ValueError:
             print(f"Invalid date format: {args.before}. Use YYYY-MM-DD", file=sys.stderr)
             sys.exit(1)
 
+    # Sort by modified time, newest first (after filtering, so only the
+    # surviving sessions are compared)
+    sessions.sort(key=session_sort_key, reverse=True)
+
+    # With a central export location every export lives under one tree, so
+    # index it once rather than checking each session's folder separately
+    central_index = None
+    if args.list or args.skip_existing:
+        central_location = args.central or config.get('central_export_location')
+        if central_location:
+            central_index = index_central_exports(os.path.expanduser(central_location))
+
     # List mode
     if args.list:
-        print(f"\nFound {len(sessions)} session(s):\n")
-        print(f"{'Session ID':<12} {'Project':<30} {'Modified':<20} {'Size':<10} {'Exported?':<10}")
-        print("-" * 90)
+        # Build the whole table and write it once rather than a print per row
+        format_row = LIST_ROW_FORMAT.format
+        rows = [
+            f"\nFound {len(sessions)} session(s):\n",
+            format_row('Session ID', 'Project', 'Started' if args.use_jsonl_timestamps else 'Modified',
+                       'Size', 'Exported?'),
+            "-" * 90,
+        ]
 
         for session in sessions:
-            existing = check_existing_export(session, config, args.central)
+            existing = check_existing_export(session, config, args.central, central_index)
             exported = "Yes" if existing else "No"
-            modified = session['modified_time'].strftime('%Y-%m-%d %H:%M') if session['modified_time'] else 'Unknown'
-            size = format_size(session['file_size'])
+            modified = time.strftime(LIST_TIME_FORMAT, time.localtime(session.mtime))
+            size = format_size(session.file_size)
 
-            print(f"{session['short_id']:<12} {session['project_name']:<30} {modified:<20} {size:<10} {exported:<10}")
+            rows.append(format_row(session.short_id, session.project_name, modified, size, exported))
 
-        print()
+        rows.append("\n")
+        sys.stdout.write("\n".join(rows))
         sys.exit(0)
 
     # Check for existing exports if skip-existing
+    manifest = load_manifest()
+
     if args.skip_existing:
         original_count = len(sessions)
-        sessions = [s for s in sessions if not check_existing_export(s, config, args.central)]
+        sessions = [s for s in sessions
+                    if not is_unchanged_since_export(s, manifest)
+                    and not check_existing_export(s, config, args.central, central_index)]
         skipped = original_count - len(sessions)
         if skipped > 0:
             print(f"Skipping {skipped} already exported session(s)")
@@ -332,23 +596,81 @@ Examples:
     success_count = 0
     fail_count = 0
 
-    for i, session in enumerate(sessions, 1):
-        prefix = f"[{i}/{len(sessions)}]"
-        project_info = f"{session['project_name']} ({session['short_id']})"
-
-        print(f"{prefix} {project_info}...", end=' ', flush=True)
+    # Each export is independent, so run them in a process pool and report
+    # results in the original order as they complete
+    max_workers = max(1, min(args.jobs or os.cpu_count() or 1, len(sessions)))
+    export = partial(export_session, dry_run=args.dry_run)
 
-        success, message = export_session(session, export_script, args.dry_run)
-
-        if success:
-            success_count += 1
-            if args.verbose:
-                print(f"OK\n    {message}")
-            else:
-                print("OK")
-        else:
-            fail_count += 1
-            print(f"FAILED\n    {message}")
+    futures = [None] * len(sessions)
+    i = 0
+    # After a worker crash the session being waited on is rerun on its own,
+    # since a broken pool fails every export that was still in flight
+    retry_alone = False
+    try:
+        while i < len(sessions):
+            # A timed-out export cannot be cancelled and a crashed worker breaks
+            # the whole pool, so either way the pool is torn down and the
+            # remaining sessions continue in a fresh one
+            timed_out = False
+            stop = i + 1 if retry_alone else len(sessions)
+            executor = ProcessPoolExecutor(max_workers=1 if retry_alone else max_workers,
+                                           initializer=load_exporter,
+                                           initargs=(str(export_script),))
+            try:
+                for j in range(i, stop):
+                    # Keep results that finished before an earlier pool was torn down
+                    future = futures[j]
+                    if (future is None or not future.done() or future.cancelled()
+                            or future.exception() is not None):
+                        futures[j] = executor.submit(export, sessions[j])
+
+                while i < stop:
+                    session = sessions[i]
+                    pool_broken = False
+                    # The timeout counts from when this loop starts waiting, not
+                    # from when the export started. Every earlier session has
+                    # finished by then, so the export gets at least this long
+                    try:
+                        success, message, exported_path = futures[i].result(timeout=EXPORT_TIMEOUT_SECONDS)
+                    except FutureTimeoutError:
+                        timed_out = True
+                        success, message, exported_path = False, "Export timed out", None
+                    except BrokenProcessPool:
+                        if not retry_alone:
+                            retry_alone = True
+                            break
+                        pool_broken = True
+                        success, message, exported_path = False, "Export worker crashed", None
+                    except Exception as e:
+                        success, message, exported_path = False, str(e), None
+                    retry_alone = False
+                    i += 1
+
+                    prefix = f"[{i}/{len(sessions)}]"
+                    project_info = f"{session.project_name} ({session.short_id})"
+
+                    if success:
+                        success_count += 1
+                        if exported_path:
+                            manifest[session.session_id] = [session.mtime_ns, session.file_size, exported_path]
+                        if args.verbose:
+                            print(f"{prefix} {project_info}... OK\n    {message}", flush=True)
+                        else:
+                            print(f"{prefix} {project_info}... OK", flush=True)
+                    else:
+                        fail_count += 1
+                        print(f"{prefix} {project_info}... FAILED\n    {message}", flush=True)
+
+                    if timed_out or pool_broken:
+                        break
+            finally:
+                if timed_out:
+                    terminate_pool_workers(executor)
+                executor.shutdown(wait=not timed_out)
+    finally:
+        # Record the sessions that did export even if the batch is cut short
+        if not args.dry_run:
+            save_manifest(manifest)
 
     # Summary
     print(f"\n{'[DRY RUN] ' if args.dry_run else ''}Complete: {success_count} exported, {fail_count} failed")
@@ -17,16 +17,27 @@ Features:
 import json
 import sys
 import os
-import glob
 import html
 import re
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from collections import Counter
+from functools import lru_cache, partial
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-# Default configuration - all available options
-DEFAULT_CONFIG = {
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+
+# Default configuration - all available options (read-only; load_config merges into a copy)
+DEFAULT_CONFIG = MappingProxyType({
     # Display names
     "user_name": "You",
     "assistant_name": "Claude",
@@ -82,10 +93,10 @@ DEFAULT_CONFIG = {
     # Date/time formats (Python strftime)
     "date_format": "%Y-%m-%d %H:%M:%S",
     "time_format": "%H:%M:%S"
-}
+})
 
 # Common stop words to filter out when generating summary
-STOP_WORDS = {
+STOP_WORDS = frozenset({
     'i', 'me', 'my', 'we', 'our', 'you', 'your', 'the', 'a', 'an', 'is', 'are',
     'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does',
     'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall',
@@ -98,25 +109,73 @@ STOP_WORDS = {
     'this', 'that', 'these', 'those', 'am', 'it', 'its', 'also', 'about', 'like',
     'want', 'need', 'please', 'help', 'make', 'get', 'let', 'see', 'look', 'thing',
     'something', 'anything', 'everything', 'nothing', 'use', 'using', 'used'
-}
+})
+
+# Transcripts are read in chunks of this size when parsing
+JSONL_READ_CHUNK_SIZE = 256 * 1024
+
+# Exports routinely run to hundreds of KB or more, so write them through a
+# larger buffer to keep the number of write() syscalls down
+HTML_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# copy_transcript asks copy_file_range for at least this much per call once
+# the stat()ed size is copied, to pick up lines appended to a live transcript
+TRANSCRIPT_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Same output as json.dumps(..., indent=2), but iterencode lets
+# format_tool_input stop once it has more than it will display
+TOOL_INPUT_ENCODER = json.JSONEncoder(indent=2)
+
+# generate_summary only counts keywords in this much of the user text left
+# after code blocks, URLs and paths are stripped, so huge pastes of prose do not
+# make it tokenize and count megabytes of words
+MAX_SUMMARY_INPUT_CHARS = 65536
+
+# Patterns used by generate_summary, compiled once at import.
+# Code blocks, URLs, file paths and inline code are stripped in one pass.
+SUMMARY_NOISE_RE = re.compile(r'```.*?```|https?://\S+|/[\w/.-]+|`[^`]+`', re.DOTALL)
+WORD_RE = re.compile(r'\b[a-z]{3,}\b')
+
+# Maps every ASCII character that is not a regex word character to a space,
+# so str.split() yields the same word runs WORD_RE sees for ASCII text
+ASCII_WORD_SPLIT_TABLE = str.maketrans({
+    chr(c): ' ' for c in range(128) if not (chr(c).isalnum() or chr(c) == '_')
+})
+
+# Action patterns looked for in the first user message, in priority order.
+# Each pattern is paired with its trigger verbs so it is only searched when
+# one of them appears as a whole word in the message.
+ACTION_VERBS = [
+    ('building', ('create', 'build', 'make', 'develop', 'implement')),
+    ('fixing', ('fix', 'debug', 'solve', 'resolve')),
+    ('adding', ('add', 'integrate', 'include')),
+    ('updating', ('update', 'modify', 'change', 'edit')),
+    ('setting up', ('setup', 'configure', 'install')),
+    ('exporting', ('export', 'convert', 'transform')),
+    ('testing', ('test', 'verify', 'check')),
+    ('improving', ('refactor', 'optimize', 'improve')),
+]
+ACTION_PATTERNS = [
+    (re.compile(r'\b(' + '|'.join(verbs) + r')\b.*?\b(\w+)'), action, frozenset(verbs))
+    for action, verbs in ACTION_VERBS
+]
+WORD_RUN_RE = re.compile(r'\w+')
 
 
 def load_config():
     """Load configuration from file or use defaults."""
     config_path = Path.home() / ".claude" / "conversation-export-config.json"
-    config = DEFAULT_CONFIG.copy()
+    user_config = {}
 
     if config_path.exists():
         try:
-            with open(config_path, 'r') as f:
-                user_config = json.load(f)
-                # Filter out comments
-                user_config = {k: v for k, v in user_config.items() if not k.startswith('_')}
-                config.update(user_config)
+            loaded = json_loads(config_path.read_bytes())
+            # Filter out comments
+            user_config = {k: v for k, v in loaded.items() if not k.startswith('_')}
         except (json.JSONDecodeError, IOError) as e:
             print(f"Warning: Could not load config: {e}", file=sys.stderr)
 
-    return config
+    return {**DEFAULT_CONFIG, **user_config}
 
 
 def generate_summary(conversation, project_name, max_words=5):
@@ -135,21 +194,34 @@ def generate_summary(conversation, project_name, max_words=5):
     if not user_texts:
         return f"{project_name} session"
 
-    # Combine and clean text
-    combined_text = " ".join(user_texts).lower()
+    # Combine and clean text; the lowered first message is reused for action patterns
+    first_msg = user_texts[0].lower()
+    combined_text = " ".join([first_msg] + [text.lower() for text in user_texts[1:]])
+    if len(combined_text) < 3:
+        # Too short to hold a single keyword
+        return f"{project_name} session"
 
     # Remove code blocks, URLs, file paths
-    combined_text = re.sub(r'```.*?```', '', combined_text, flags=re.DOTALL)
-    combined_text = re.sub(r'https?://\S+', '', combined_text)
-    combined_text = re.sub(r'/[\w/.-]+', '', combined_text)
-    combined_text = re.sub(r'`[^`]+`', '', combined_text)
-
-    # Extract words
-    words = re.findall(r'\b[a-z]{3,}\b', combined_text)
+    combined_text = SUMMARY_NOISE_RE.sub('', combined_text)
+    if len(combined_text) < 3:
+        return f"{project_name} session"
+    if len(combined_text) > MAX_SUMMARY_INPUT_CHARS:
+        # Cut only after the noise is gone (so a fence is never split), and
+        # back to a whitespace boundary so no word is counted half-way
+        combined_text = combined_text[:MAX_SUMMARY_INPUT_CHARS].rsplit(None, 1)[0]
+
+    # Extract words: ASCII tokens are whole word runs, so they match when they
+    # are 3+ letters; only tokens with non-ASCII characters need the regex
+    words = []
+    for token in combined_text.translate(ASCII_WORD_SPLIT_TABLE).split():
+        if token.isascii():
+            if len(token) >= 3 and token.isalpha():
+                words.append(token)
+        else:
+            words.extend(WORD_RE.findall(token))
 
     # Filter stop words and count
-    meaningful_words = [w for w in words if w not in STOP_WORDS]
-    word_counts = Counter(meaningful_words)
+    word_counts = Counter(w for w in words if w not in STOP_WORDS)
 
     # Get top words
     top_words = [word for word, _ in word_counts.most_common(max_words)]
@@ -158,20 +230,16 @@ def generate_summary(conversation, project_name, max_words=5):
         return f"{project_name} session"
 
     # Look for action patterns in first message
-    first_msg = user_texts[0].lower()
-    action_patterns = [
-        (r'\b(create|build|make|develop|implement)\b.*?\b(\w+)', 'building'),
-        (r'\b(fix|debug|solve|resolve)\b.*?\b(\w+)', 'fixing'),
-        (r'\b(add|integrate|include)\b.*?\b(\w+)', 'adding'),
-        (r'\b(update|modify|change|edit)\b.*?\b(\w+)', 'updating'),
-        (r'\b(setup|configure|install)\b.*?\b(\w+)', 'setting up'),
-        (r'\b(export|convert|transform)\b.*?\b(\w+)', 'exporting'),
-        (r'\b(test|verify|check)\b.*?\b(\w+)', 'testing'),
-        (r'\b(refactor|optimize|improve)\b.*?\b(\w+)', 'improving'),
-    ]
-
-    for pattern, action in action_patterns:
-        match = re.search(pattern, first_msg)
+    first_words = set()
+    for token in first_msg.translate(ASCII_WORD_SPLIT_TABLE).split():
+        if token.isascii():
+            first_words.add(token)
+        else:
+            first_words.update(WORD_RUN_RE.findall(token))
+    for pattern, action, verbs in ACTION_PATTERNS:
+        if first_words.isdisjoint(verbs):
+            continue
+        match = pattern.search(first_msg)
         if match:
             # Construct summary with action and top keywords
             keywords = " ".join(top_words[:3])
@@ -302,6 +370,8 @@ THEMES = {
         "tool_bg": "#3b4252"
     }
 }
+# Themes are shared module state, so expose them as read-only views
+THEMES = MappingProxyType({name: MappingProxyType(theme) for name, theme in THEMES.items()})
 
 # Auto theme uses both dark and light with CSS media query
 # Uses the original colorful themes for better visual appeal
@@ -309,40 +379,9 @@ AUTO_THEME_DARK = THEMES["dark"]
 AUTO_THEME_LIGHT = THEMES["light"]
 
 
-def get_html_template(theme_name, config):
-    """Get HTML template with theme colors applied."""
-    custom_colors = config.get("custom_colors") or {}
-    is_auto = theme_name == "auto"
-
-    # Build header meta section based on config
-    meta_items = []
-    if config.get("show_summary", True):
-        meta_items.append('<p><strong>Summary:</strong> {summary}</p>')
-    if config.get("show_session_id", True):
-        meta_items.append('<p><strong>Session ID:</strong> <code>{session_id}</code></p>')
-    if config.get("show_project_path", True):
-        meta_items.append('<p><strong>Project:</strong> <code>{project_dir}</code></p>')
-    if config.get("show_timestamp", True):
-        meta_items.append('<p><strong>Created (UTC):</strong> {created}</p>')
-        meta_items.append('<p><strong>Last Updated (UTC):</strong> {timestamp}</p>')
-
-    # Add tip about renaming
-    meta_items.append('<p class="tip"><em>Tip: You can rename this file (keep the <code>{short_id}_</code> prefix) and it will be preserved on resume.</em></p>')
-
-    # Stats section placeholder (will be replaced with actual stats)
-    meta_items.append('{stats_section}')
-
-    meta_html = "\n            ".join(meta_items) if meta_items else ""
-
-    def apply_custom(theme_dict):
-        """Apply custom color overrides to a theme."""
-        result = theme_dict.copy()
-        result.update(custom_colors)
-        return result
-
-    def theme_to_css_vars(theme):
-        """Convert theme dict to CSS variable declarations."""
-        return f"""
+def theme_to_css_vars(theme):
+    """Convert theme dict to CSS variable declarations."""
+    return f"""
             --bg-color: {theme["bg_color"]};
             --card-bg: {theme["card_bg"]};
             --user-bg: {theme["user_bg"]};
@@ -355,50 +394,15 @@ def get_html_template(theme_name, config):
             --code-bg: {theme["code_bg"]};
             --tool-bg: {theme["tool_bg"]};"""
 
-    # Build CSS with theme colors
-    if is_auto:
-        # Auto theme: use media queries for system preference
-        dark_theme = apply_custom(AUTO_THEME_DARK)
-        light_theme = apply_custom(AUTO_THEME_LIGHT)
-        css_vars = f"""
-        /* Auto theme - adapts to system preference */
-        :root {{
-            {theme_to_css_vars(light_theme)}
-        }}
 
-        @media (prefers-color-scheme: dark) {{
-            :root {{
-                {theme_to_css_vars(dark_theme)}
-            }}
-        }}"""
-    else:
-        # Static theme
-        theme = apply_custom(THEMES.get(theme_name, THEMES["dark"]))
-        css_vars = f"""
-        :root {{
-            {theme_to_css_vars(theme)}
-        }}"""
+# CSS variable blocks for each built-in theme, used when no custom colors are set
+THEME_CSS_VARS = {name: theme_to_css_vars(theme) for name, theme in THEMES.items()}
+AUTO_THEME_DARK_CSS_VARS = theme_to_css_vars(AUTO_THEME_DARK)
+AUTO_THEME_LIGHT_CSS_VARS = theme_to_css_vars(AUTO_THEME_LIGHT)
 
-    # Common CSS (combined with theme variables)
-    css = css_vars + """
-
-        * {
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
-            background-color: var(--bg-color);
-            color: var(--text-color);
-            font-size: """ + config.get("font_size", "16px") + """;
-            line-height: """ + config.get("line_height", "1.75") + """;
-            letter-spacing: """ + config.get("letter_spacing", "0.01em") + """;
-            margin: 0;
-            padding: """ + config.get("padding", "24px") + """;
-            max-width: """ + config.get("max_width", "920px") + """;
-            margin: 0 auto;
-        }
 
+# Static part of the stylesheet that follows the configurable body rules
+COMMON_CSS = """
         header {
             background: var(--card-bg);
             padding: 20px;
@@ -843,8 +847,8 @@ def get_html_template(theme_name, config):
         }
     """
 
-    # Theme toggle JavaScript
-    theme_toggle_js = """
+# Theme toggle script appended to every export
+THEME_TOGGLE_JS = """
     <script>
     (function() {
         const STORAGE_KEY = 'claude-export-theme';
@@ -928,14 +932,141 @@ def get_html_template(theme_name, config):
     </script>
 """
 
-    html = """<!DOCTYPE html>
+
+def get_html_template(theme_name, config):
+    """Get HTML template with theme colors applied."""
+    custom_colors = config.get("custom_colors") or {}
+    return build_html_template(
+        theme_name,
+        tuple(sorted(custom_colors.items())),
+        config.get("font_size", "16px"),
+        config.get("line_height", "1.75"),
+        config.get("letter_spacing", "0.01em"),
+        config.get("padding", "24px"),
+        config.get("max_width", "920px"),
+        bool(config.get("show_summary", True)),
+        bool(config.get("show_session_id", True)),
+        bool(config.get("show_project_path", True)),
+        bool(config.get("show_timestamp", True)),
+    )
+
+
+@lru_cache(maxsize=32)
+def build_meta_html(show_summary, show_session_id, show_project_path, show_timestamp):
+    """Build the header meta block for the given show_* flags."""
+    # Build header meta section from the enabled fields
+    meta_items = []
+    if show_summary:
+        meta_items.append('<p><strong>Summary:</strong> {summary}</p>')
+    if show_session_id:
+        meta_items.append('<p><strong>Session ID:</strong> <code>{session_id}</code></p>')
+    if show_project_path:
+        meta_items.append('<p><strong>Project:</strong> <code>{project_dir}</code></p>')
+    if show_timestamp:
+        meta_items.append('<p><strong>Created (UTC):</strong> {created}</p>')
+        meta_items.append('<p><strong>Last Updated (UTC):</strong> {timestamp}</p>')
+
+    # Add tip about renaming
+    meta_items.append('<p class="tip"><em>Tip: You can rename this file (keep the <code>{short_id}_</code> prefix) and it will be preserved on resume.</em></p>')
+
+    # Stats section placeholder (will be replaced with actual stats)
+    meta_items.append('{stats_section}')
+
+    return "\n            ".join(meta_items)
+
+
+@lru_cache(maxsize=16)
+def build_html_template(theme_name, custom_colors, font_size, line_height, letter_spacing,
+                        padding, max_width, show_summary, show_session_id, show_project_path,
+                        show_timestamp):
+    """
+    Build the HTML template for one theme and set of layout options.
+    Cached, since every export in a batch run uses the same settings.
+    """
+    custom_colors = dict(custom_colors)
+    is_auto = theme_name == "auto"
+
+    meta_html = build_meta_html(show_summary, show_session_id, show_project_path, show_timestamp)
+
+    def apply_custom(theme_dict):
+        """Apply custom color overrides to a theme."""
+        return {**theme_dict, **custom_colors}
+
+    def css_vars_for(theme, precomputed):
+        """CSS variables for a theme, reusing the precomputed block when no custom colors are set."""
+        if custom_colors:
+            return theme_to_css_vars(apply_custom(theme))
+        return precomputed
+
+    # Build CSS with theme colors
+    if is_auto:
+        # Auto theme: use media queries for system preference
+        css_vars = f"""
+        /* Auto theme - adapts to system preference */
+        :root {{
+            {css_vars_for(AUTO_THEME_LIGHT, AUTO_THEME_LIGHT_CSS_VARS)}
+        }}
+
+        @media (prefers-color-scheme: dark) {{
+            :root {{
+                {css_vars_for(AUTO_THEME_DARK, AUTO_THEME_DARK_CSS_VARS)}
+            }}
+        }}"""
+    else:
+        # Static theme
+        if theme_name not in THEMES:
+            theme_name = "dark"
+        css_vars = f"""
+        :root {{
+            {css_vars_for(THEMES[theme_name], THEME_CSS_VARS[theme_name])}
+        }}"""
+
+    # Common CSS (combined with theme variables)
+    css = "".join([
+        css_vars,
+        """
+
+        * {
+            box-sizing: border-box;
+        }
+
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
+            background-color: var(--bg-color);
+            color: var(--text-color);
+            font-size: """,
+        font_size,
+        """;
+            line-height: """,
+        line_height,
+        """;
+            letter-spacing: """,
+        letter_spacing,
+        """;
+            margin: 0;
+            padding: """,
+        padding,
+        """;
+            max-width: """,
+        max_width,
+        """;
+            margin: 0 auto;
+        }
+""",
+        COMMON_CSS,
+    ])
+
+    html = "".join([
+        """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
     <style>
-""" + css + """
+""",
+        css,
+        """
     </style>
 </head>
 <body>
@@ -944,69 +1075,135 @@ def get_html_template(theme_name, config):
     <header>
         <h1>💬 {title}</h1>
         <div class="meta">
-            """ + meta_html + """
+            """,
+        meta_html,
+        """
         </div>
     </header>
 
     <main>
 {content}
     </main>
-""" + theme_toggle_js + """
+""",
+        THEME_TOGGLE_JS,
+        """
 </body>
 </html>
-"""
+""",
+    ])
     return html
 
 
+# Direct binding for call sites that always pass a str; escape_html is for
+# values taken straight from transcript JSON that may be missing or non-str
+html_escape = html.escape
+
+
+# Strings shorter than this (tool names, descriptions, paths) recur across a
+# conversation and are escaped through a cache; longer ones bypass it
+ESCAPE_CACHE_MAX_LENGTH = 256
+
+
 def escape_html(text):
     """Escape HTML special characters."""
     if not text:
         return ""
-    return html.escape(str(text))
+    text = str(text)
+    if len(text) < ESCAPE_CACHE_MAX_LENGTH:
+        return escape_short_html(text)
+    return html_escape(text)
+
+
+@lru_cache(maxsize=4096)
+def escape_short_html(text):
+    """Cached html.escape for short, frequently repeated strings."""
+    return html_escape(text)
 
 
 def format_timestamp(ts, config):
     """Format ISO timestamp to readable time."""
     if not ts:
         return ""
+    return format_timestamp_as(ts, config.get("time_format", "%H:%M:%S"))
+
+
+@lru_cache(maxsize=4096)
+def parse_iso_timestamp(ts):
+    """
+    Parse an ISO 8601 transcript timestamp, accepting a trailing 'Z' for UTC.
+    Returns None for anything that is not an ISO date/time instead of raising.
+    Cached, since the same timestamps are parsed for message times, the
+    session duration and the Created date.
+    """
+    # Cheap shape check so non-timestamps are rejected without an exception
+    if not isinstance(ts, str) or len(ts) < 10 or ts[4] != '-' or ts[7] != '-':
+        return None
     try:
-        dt = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-        time_format = config.get("time_format", "%H:%M:%S")
-        return dt.strftime(time_format)
-    except:
-        return ts[:19] if len(ts) >= 19 else ts
+        return datetime.fromisoformat(ts[:-1] + '+00:00' if ts.endswith('Z') else ts)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp_as(ts, time_format):
+    """
+    Format an ISO timestamp with the given strftime format.
+    Cached, since transcript entries often repeat a timestamp.
+    """
+    dt = parse_iso_timestamp(ts)
+    if dt is not None:
+        try:
+            return dt.strftime(time_format)
+        except (ValueError, TypeError):
+            pass
+    return ts[:19] if len(ts) >= 19 else ts
+
+
+def file_basename(path):
+    """Return the last component of a POSIX or Windows path without building a Path."""
+    path = path.rstrip('/\\')
+    return path[max(path.rfind('/'), path.rfind('\\')) + 1:]
+
+
+def describe_bash(tool_input):
+    """Describe a Bash call by its description, or the start of its command."""
+    desc = tool_input.get("description", "")
+    if desc:
+        return desc
+    cmd = tool_input.get("command", "")
+    return cmd[:50] + "..." if len(cmd) > 50 else cmd
+
+
+def describe_file_tool(verb, tool_input):
+    """Describe a Read/Write/Edit call by the file it touches."""
+    path = tool_input.get('file_path', 'file')
+    return f"{verb} {file_basename(path)}"
+
+
+def describe_web_fetch(tool_input):
+    """Describe a WebFetch call by its (truncated) URL."""
+    url = tool_input.get('url', '')
+    return f"Fetch: {url[:35]}..." if len(url) > 35 else f"Fetch: {url}"
+
+
+# Short description builders for known tools, keyed by tool name
+TOOL_DESCRIBERS = {
+    "Bash": describe_bash,
+    "Read": partial(describe_file_tool, "Read"),
+    "Write": partial(describe_file_tool, "Write"),
+    "Edit": partial(describe_file_tool, "Edit"),
+    "Glob": lambda tool_input: f"Find: {tool_input.get('pattern', '')}",
+    "Grep": lambda tool_input: f"Search: {tool_input.get('pattern', '')}",
+    "Task": lambda tool_input: tool_input.get("description", "Run subagent"),
+    "WebSearch": lambda tool_input: f"Search: {tool_input.get('query', '')[:30]}",
+    "WebFetch": describe_web_fetch,
+}
 
 
 def get_tool_description(tool_name, tool_input):
     """Generate a short description for a tool call."""
-    if tool_name == "Bash":
-        cmd = tool_input.get("command", "")
-        desc = tool_input.get("description", "")
-        if desc:
-            return desc
-        return cmd[:50] + "..." if len(cmd) > 50 else cmd
-    elif tool_name == "Read":
-        path = tool_input.get('file_path', 'file')
-        return f"Read {Path(path).name}"
-    elif tool_name == "Write":
-        path = tool_input.get('file_path', 'file')
-        return f"Write {Path(path).name}"
-    elif tool_name == "Edit":
-        path = tool_input.get('file_path', 'file')
-        return f"Edit {Path(path).name}"
-    elif tool_name == "Glob":
-        return f"Find: {tool_input.get('pattern', '')}"
-    elif tool_name == "Grep":
-        return f"Search: {tool_input.get('pattern', '')}"
-    elif tool_name == "Task":
-        return tool_input.get("description", "Run subagent")
-    elif tool_name == "WebSearch":
-        return f"Search: {tool_input.get('query', '')[:30]}"
-    elif tool_name == "WebFetch":
-        url = tool_input.get('url', '')
-        return f"Fetch: {url[:35]}..." if len(url) > 35 else f"Fetch: {url}"
-    else:
-        return tool_name
+    describer = TOOL_DESCRIBERS.get(tool_name)
+    return describer(tool_input) if describer else tool_name
 
 
 def format_tool_input(tool_name, tool_input, config):
@@ -1019,10 +1216,17 @@ def format_tool_input(tool_name, tool_input, config):
     elif tool_name in ["Read", "Write", "Edit"]:
         return f"<p><strong>File:</strong> <code>{escape_html(tool_input.get('file_path', ''))}</code></p>"
     else:
-        formatted = json.dumps(tool_input, indent=2)
-        if len(formatted) > max_length:
+        parts = []
+        length = 0
+        for chunk in TOOL_INPUT_ENCODER.iterencode(tool_input):
+            parts.append(chunk)
+            length += len(chunk)
+            if length > max_length:
+                break
+        formatted = "".join(parts)
+        if length > max_length:
             formatted = formatted[:max_length] + "\n..."
-        return f"<pre><code>{escape_html(formatted)}</code></pre>"
+        return f"<pre><code>{html_escape(formatted)}</code></pre>"
 
 
 def format_tool_result(result_content, config):
@@ -1030,11 +1234,10 @@ def format_tool_result(result_content, config):
     max_length = config.get("max_tool_result_length", 1000)
 
     if isinstance(result_content, list):
-        texts = []
-        for block in result_content:
-            if isinstance(block, dict) and block.get("type") == "text":
-                texts.append(block.get("text", ""))
-        result_content = "\n".join(texts)
+        result_content = "\n".join([
+            block.get("text", "") for block in result_content
+            if isinstance(block, dict) and block.get("type") == "text"
+        ])
 
     if not isinstance(result_content, str):
         result_content = str(result_content)
@@ -1042,23 +1245,113 @@ def format_tool_result(result_content, config):
     if len(result_content) > max_length:
         result_content = result_content[:max_length] + "\n... (truncated)"
 
-    return f"<pre><code>{escape_html(result_content)}</code></pre>"
-
+    return f"<pre><code>{html_escape(result_content)}</code></pre>"
 
-def parse_conversation(jsonl_path, config):
-    """Parse JSONL and extract conversation with tool tracking and statistics."""
-    include_thinking = config.get("include_thinking", False)
 
-    entries = []
-    with open(jsonl_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+def iter_jsonl_entries(jsonl_path):
+    """
+    Yield each JSON entry in a transcript, skipping blank and malformed lines.
+    Reads raw bytes in large chunks and splits on newlines itself, rather than
+    going through text-mode line iteration.
+    """
+    with open(jsonl_path, 'rb') as f:
+        pending = []  # pieces of a line that spans chunk boundaries
+        for chunk in iter(partial(f.read, JSONL_READ_CHUNK_SIZE), b''):
+            end = chunk.rfind(b'\n')
+            if end < 0:
+                pending.append(chunk)
                 continue
+            pending.append(chunk[:end])
+            lines = b''.join(pending).split(b'\n')
+            pending = [chunk[end + 1:]]
+            yield from parse_jsonl_lines(lines)
+        yield from parse_jsonl_lines([b''.join(pending)])
+
+
+def parse_jsonl_lines(lines):
+    """Decode JSONL lines, skipping blank and malformed ones."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json_loads(line)
+        except json.JSONDecodeError:
+            # orjson is stricter than json (lone surrogates, NaN), so retry
+            # with the standard parser before dropping the line
             try:
-                entries.append(json.loads(line))
+                entry = json.loads(line)
             except json.JSONDecodeError:
                 continue
+        yield entry
+
+
+def parse_text_block(block, current_msg, timestamp, state):
+    """Add a text block to the current Claude message, starting one if needed."""
+    text = block.get("text", "").strip()
+    if not text:
+        return current_msg
+    state["has_text_content"] = True
+    if current_msg is None:
+        return {
+            "type": "claude",
+            "timestamp": timestamp,
+            "content": text,
+            "tools": []
+        }
+    current_msg["content"] += "\n\n" + text
+    return current_msg
+
+
+def parse_thinking_block(block, current_msg, timestamp, state):
+    """Add a preview of a thinking block to the current Claude message."""
+    thinking = block.get("thinking", "").strip()
+    if thinking and current_msg:
+        preview = thinking[:200] + "..." if len(thinking) > 200 else thinking
+        current_msg["content"] += f"\n\n*[Thinking: {preview}]*"
+    return current_msg
+
+
+def parse_tool_use_block(block, current_msg, timestamp, state):
+    """Record a tool call and attach it to the current Claude message."""
+    block_get = block.get
+    tool_id = block_get("id", "")
+    tool_name = block_get("name", "unknown")
+
+    state["tool_calls"][tool_id] = {
+        "name": tool_name,
+        "input": block_get("input", {}),
+        "timestamp": timestamp,
+        "result": None
+    }
+
+    # Track tool usage for stats
+    state["tool_usage"][tool_name] += 1
+
+    if current_msg is None:
+        current_msg = {
+            "type": "claude",
+            "timestamp": timestamp,
+            "content": "",
+            "tools": []
+        }
+
+    current_msg["tools"].append(tool_id)
+    return current_msg
+
+
+# Parsers for assistant content blocks, keyed by block type. Each takes the
+# current Claude message (or None) and returns it, possibly newly started.
+ASSISTANT_BLOCK_PARSERS = {
+    "text": parse_text_block,
+    "thinking": parse_thinking_block,
+    "tool_use": parse_tool_use_block,
+}
+
+
+def parse_conversation(jsonl_path, config):
+    """Parse JSONL and extract conversation with tool tracking and statistics."""
+    include_thinking = config.get("include_thinking", False)
 
     tool_calls = {}
     conversation = []
@@ -1077,24 +1370,35 @@ def parse_conversation(jsonl_path, config):
         "tool_usage": Counter(),  # Tool name -> count
     }
 
-    for entry in entries:
-        entry_type = entry.get("type", "")
-        timestamp = entry.get("timestamp", "")
+    # Shared with the assistant block parsers
+    state = {"tool_calls": tool_calls, "tool_usage": stats["tool_usage"], "has_text_content": False}
+    block_parsers = ASSISTANT_BLOCK_PARSERS
+    if not include_thinking:
+        block_parsers = {k: v for k, v in block_parsers.items() if k != "thinking"}
+
+    # Counters are kept in locals inside the loop and written back afterwards
+    user_messages = claude_messages = 0
+    total_input_tokens = total_output_tokens = 0
+    cache_creation_tokens = cache_read_tokens = 0
 
-        # Capture the first timestamp from the conversation
-        if first_timestamp is None and timestamp:
-            first_timestamp = timestamp
+    for entry in iter_jsonl_entries(jsonl_path):
+        entry_get = entry.get
+        entry_type = entry_get("type", "")
+        timestamp = entry_get("timestamp", "")
 
-        # Always update last_timestamp
         if timestamp:
+            # Capture the first timestamp from the conversation
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            # Always update last_timestamp
             last_timestamp = timestamp
 
         if entry_type == "user":
-            msg = entry.get("message", {})
+            msg = entry_get("message", {})
             content = msg.get("content") if isinstance(msg, dict) else msg
 
             if isinstance(content, str):
-                stats["user_messages"] += 1
+                user_messages += 1
                 if current_claude_msg:
                     conversation.append(current_claude_msg)
                     current_claude_msg = None
@@ -1112,82 +1416,49 @@ def parse_conversation(jsonl_path, config):
                             tool_calls[tool_id]["result"] = block.get("content", "")
 
         elif entry_type == "assistant":
-            msg = entry.get("message", {})
+            msg = entry_get("message", {})
             msg_content = msg.get("content", [])
 
             # Extract token usage from the assistant message
-            usage = msg.get("usage") or entry.get("usage") or {}
+            usage = msg.get("usage") or entry_get("usage") or {}
             if usage:
-                stats["total_input_tokens"] += usage.get("input_tokens", 0)
-                stats["total_output_tokens"] += usage.get("output_tokens", 0)
-                stats["cache_creation_tokens"] += usage.get("cache_creation_input_tokens", 0)
-                stats["cache_read_tokens"] += usage.get("cache_read_input_tokens", 0)
+                usage_get = usage.get
+                input_tokens = usage_get("input_tokens", 0)
+                output_tokens = usage_get("output_tokens", 0)
+                cache_read = usage_get("cache_read_input_tokens", 0)
+                total_input_tokens += input_tokens
+                total_output_tokens += output_tokens
+                cache_creation_tokens += usage_get("cache_creation_input_tokens", 0)
+                cache_read_tokens += cache_read
 
             if isinstance(msg_content, list):
-                has_text_content = False
+                state["has_text_content"] = False
                 for block in msg_content:
                     if not isinstance(block, dict):
                         continue
-
-                    block_type = block.get("type")
-
-                    if block_type == "text":
-                        text = block.get("text", "").strip()
-                        if text:
-                            has_text_content = True
-                            if current_claude_msg is None:
-                                current_claude_msg = {
-                                    "type": "claude",
-                                    "timestamp": timestamp,
-                                    "content": text,
-                                    "tools": []
-                                }
-                            else:
-                                current_claude_msg["content"] += "\n\n" + text
-
-                    elif block_type == "thinking" and include_thinking:
-                        thinking = block.get("thinking", "").strip()
-                        if thinking and current_claude_msg:
-                            preview = thinking[:200] + "..." if len(thinking) > 200 else thinking
-                            current_claude_msg["content"] += f"\n\n*[Thinking: {preview}]*"
-
-                    elif block_type == "tool_use":
-                        tool_id = block.get("id", "")
-                        tool_name = block.get("name", "unknown")
-                        tool_input = block.get("input", {})
-
-                        tool_calls[tool_id] = {
-                            "name": tool_name,
-                            "input": tool_input,
-                            "timestamp": timestamp,
-                            "result": None
-                        }
-
-                        # Track tool usage for stats
-                        stats["tool_usage"][tool_name] += 1
-
-                        if current_claude_msg is None:
-                            current_claude_msg = {
-                                "type": "claude",
-                                "timestamp": timestamp,
-                                "content": "",
-                                "tools": []
-                            }
-
-                        current_claude_msg["tools"].append(tool_id)
+                    block_parser = block_parsers.get(block.get("type"))
+                    if block_parser is not None:
+                        current_claude_msg = block_parser(block, current_claude_msg, timestamp, state)
 
                 # Count Claude messages (only if there's meaningful content)
                 # Count Claude messages and store per-message token usage
-                if has_text_content or (current_claude_msg and current_claude_msg["tools"]):
-                    stats["claude_messages"] += 1
+                if state["has_text_content"] or (current_claude_msg and current_claude_msg["tools"]):
+                    claude_messages += 1
                     # Store per-message usage in the message itself
                     if current_claude_msg and usage:
                         current_claude_msg["usage"] = {
-                            "input": usage.get("input_tokens", 0),
-                            "output": usage.get("output_tokens", 0),
-                            "cache_read": usage.get("cache_read_input_tokens", 0)
+                            "input": input_tokens,
+                            "output": output_tokens,
+                            "cache_read": cache_read
                         }
 
+    stats["user_messages"] = user_messages
+    stats["claude_messages"] = claude_messages
+    stats["total_input_tokens"] = total_input_tokens
+    stats["total_output_tokens"] = total_output_tokens
+    stats["cache_creation_tokens"] = cache_creation_tokens
+    stats["cache_read_tokens"] = cache_read_tokens
+
     if current_claude_msg:
         conversation.append(current_claude_msg)
 
@@ -1196,12 +1467,11 @@ def parse_conversation(jsonl_path, config):
     stats["last_timestamp"] = last_timestamp
     stats["duration_seconds"] = None
     if first_timestamp and last_timestamp:
-        try:
-            start = datetime.fromisoformat(first_timestamp.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(last_timestamp.replace('Z', '+00:00'))
+        start = parse_iso_timestamp(first_timestamp)
+        end = parse_iso_timestamp(last_timestamp)
+        # Skip the duration when one side is missing or only one has a timezone
+        if start and end and (start.tzinfo is None) == (end.tzinfo is None):
             stats["duration_seconds"] = (end - start).total_seconds()
-        except:
-            pass
 
     return conversation, tool_calls, first_timestamp, stats
 
@@ -1214,11 +1484,11 @@ def render_tools_section(tools, tool_calls, config):
     tool_count = len(tools)
     tools_label = f"Tools used ({tool_count})"
 
-    tool_items_html = ""
+    tool_items = []
     for tool_id in tools:
-        if tool_id not in tool_calls:
+        tool = tool_calls.get(tool_id)
+        if tool is None:
             continue
-        tool = tool_calls[tool_id]
         tool_name = tool["name"]
         tool_input = tool["input"]
         tool_result = tool.get("result")
@@ -1227,7 +1497,7 @@ def render_tools_section(tools, tool_calls, config):
         input_html = format_tool_input(tool_name, tool_input, config)
         result_html = format_tool_result(tool_result, config) if tool_result else "<p><em>No result captured</em></p>"
 
-        tool_items_html += f"""
+        tool_items.append(f"""
                 <details class="tool-item">
                     <summary>
                         <span class="tool-icon">🔧</span>
@@ -1241,7 +1511,8 @@ def render_tools_section(tools, tool_calls, config):
                         {result_html}
                     </div>
                 </details>
-"""
+""")
+    tool_items_html = "".join(tool_items)
 
     return f"""
             <details class="tools-container">
@@ -1253,6 +1524,55 @@ def render_tools_section(tools, tool_calls, config):
 """
 
 
+# Markdown constructs recognised in message content, matched in a single pass.
+# Fenced blocks and inline code are kept verbatim; headers and bold text can
+# contain inline code and bold, handled by MD_INLINE_RE.
+MD_BLOCK_RE = re.compile(
+    r'(?P<fence>```\w*\n(?s:.*?)```)'
+    r'|(?P<code>`[^`]+`)'
+    r'|(?P<h3>^### .+$)'
+    r'|(?P<h2>^## .+$)'
+    r'|(?P<bold>\*\*.+?\*\*)',
+    re.MULTILINE,
+)
+MD_INLINE_RE = re.compile(r'(?P<code>`[^`]+`)|(?P<bold>\*\*.+?\*\*)')
+
+
+def render_markdown(text, pattern=MD_BLOCK_RE):
+    """
+    Convert raw message text to HTML, escaping it piece by piece: the text
+    between markdown constructs is escaped as it is emitted, and each
+    construct escapes its own contents.
+    """
+    parts = []
+    pos = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        if start > pos:
+            parts.append(html_escape(text[pos:start]))
+        parts.append(render_markdown_match(match))
+        pos = match.end()
+    parts.append(html_escape(text[pos:]))
+    return "".join(parts)
+
+
+def render_markdown_match(match):
+    """Render one MD_BLOCK_RE / MD_INLINE_RE match to HTML."""
+    kind = match.lastgroup
+    text = match.group()
+    if kind == "fence":
+        # Drop the opening ```lang line and the closing fence
+        body = text[text.index("\n") + 1:-3]
+        return f"<pre><code>{html_escape(body)}</code></pre>"
+    if kind == "code":
+        return f"<code>{html_escape(text[1:-1])}</code>"
+    if kind == "h3":
+        return f"<h3>{render_markdown(text[4:], MD_INLINE_RE)}</h3>"
+    if kind == "h2":
+        return f"<h2>{render_markdown(text[3:], MD_INLINE_RE)}</h2>"
+    return f"<strong>{render_markdown(text[2:-2], MD_INLINE_RE)}</strong>"
+
+
 def render_message(msg, tool_calls, config):
     """Render a single message to HTML."""
     msg_type = msg["type"]
@@ -1284,12 +1604,7 @@ def render_message(msg, tool_calls, config):
             msg_stats_html = f'<span class="msg-stats">↓{format_token_count(input_tokens)} ↑{format_token_count(output_tokens)}</span>'
 
     # Format content
-    content_html = escape_html(content)
-    content_html = re.sub(r'```(\w*)\n(.*?)```', r'<pre><code>\2</code></pre>', content_html, flags=re.DOTALL)
-    content_html = re.sub(r'`([^`]+)`', r'<code>\1</code>', content_html)
-    content_html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', content_html, flags=re.MULTILINE)
-    content_html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', content_html, flags=re.MULTILINE)
-    content_html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', content_html)
+    content_html = render_markdown(content)
     content_html = content_html.replace('\n\n', '</p><p>')
     content_html = f"<p>{content_html}</p>" if content_html else ""
 
@@ -1341,10 +1656,13 @@ def render_stats_section(stats, config):
         return ""
 
     duration_str = format_duration(stats.get("duration_seconds"))
-    total_input = format_token_count(stats.get("total_input_tokens", 0))
-    total_output = format_token_count(stats.get("total_output_tokens", 0))
+    input_tokens = stats.get("total_input_tokens", 0)
+    output_tokens = stats.get("total_output_tokens", 0)
+    # Format each count once; the total appears in both the quick and detailed views
+    total_input = format_token_count(input_tokens)
+    total_output = format_token_count(output_tokens)
     cache_read = format_token_count(stats.get("cache_read_tokens", 0))
-    total_tokens = stats.get("total_input_tokens", 0) + stats.get("total_output_tokens", 0)
+    total_tokens = format_token_count(input_tokens + output_tokens)
     total_messages = stats.get('user_messages', 0) + stats.get('claude_messages', 0)
 
     # Top 5 tools by usage
@@ -1366,7 +1684,7 @@ def render_stats_section(stats, config):
             <span class="stat-pill">{duration_str}</span>
             <span class="stat-pill">{total_messages} msgs</span>
             <span class="stat-pill">{total_tool_calls} tools</span>
-            <span class="stat-pill">{format_token_count(total_tokens)} tokens</span>
+            <span class="stat-pill">{total_tokens} tokens</span>
         </p>
 """
 
@@ -1397,7 +1715,7 @@ def render_stats_section(stats, config):
                             <span class="stat-label">Cache Read:</span> {cache_read}
                         </span>
                         <span class="stat-item">
-                            <span class="stat-label">Total:</span> {format_token_count(total_tokens)}
+                            <span class="stat-label">Total:</span> {total_tokens}
                         </span>
                     </div>
                     <div class="stats-row">
@@ -1409,8 +1727,17 @@ def render_stats_section(stats, config):
 """
 
 
+# Header placeholders in the HTML template, filled by convert_to_html
+HTML_PLACEHOLDER_RE = re.compile(
+    r'\{(title|summary|session_id|short_id|project_dir|created|timestamp|stats_section)\}'
+)
+
+
 def convert_to_html(jsonl_path, project_dir, session_id, config, created_date=None):
-    """Convert JSONL transcript to HTML."""
+    """
+    Convert JSONL transcript to HTML.
+    Returns an iterator over the document's parts, and the summary.
+    """
     conversation, tool_calls, first_timestamp, stats = parse_conversation(jsonl_path, config)
 
     project_name = Path(project_dir).name
@@ -1427,11 +1754,11 @@ def convert_to_html(jsonl_path, project_dir, session_id, config, created_date=No
 
     html_template = get_html_template(config.get("theme", "dark"), config)
 
-    content_html = ""
+    content_parts = []
     for msg in conversation:
         if not msg["content"].strip() and not msg["tools"]:
             continue
-        content_html += render_message(msg, tool_calls, config)
+        content_parts.append(render_message(msg, tool_calls, config))
 
     # Format timestamps (all in UTC for consistency with conversation timestamps)
     date_format = config.get("date_format", "%Y-%m-%d %H:%M:%S")
@@ -1443,30 +1770,43 @@ def convert_to_html(jsonl_path, project_dir, session_id, config, created_date=No
         formatted_created = created_date
     elif first_timestamp:
         # Parse and format the first message timestamp from the JSONL (keep UTC)
-        try:
-            dt = datetime.fromisoformat(first_timestamp.replace('Z', '+00:00'))
-            formatted_created = dt.strftime(date_format)
-        except:
-            formatted_created = first_timestamp
+        formatted_created = first_timestamp
+        dt = parse_iso_timestamp(first_timestamp)
+        if dt is not None:
+            try:
+                formatted_created = dt.strftime(date_format)
+            except (ValueError, TypeError):
+                pass
     else:
         formatted_created = formatted_timestamp
 
     # Render statistics section
     stats_html = render_stats_section(stats, config)
 
-    # Use replace instead of format to avoid issues with CSS braces
-    result = html_template
-    result = result.replace("{title}", escape_html(title))
-    result = result.replace("{summary}", escape_html(summary))
-    result = result.replace("{session_id}", escape_html(session_id))
-    result = result.replace("{short_id}", escape_html(session_id[:8] if len(session_id) > 8 else session_id))
-    result = result.replace("{project_dir}", escape_html(project_dir))
-    result = result.replace("{created}", formatted_created)
-    result = result.replace("{timestamp}", formatted_timestamp)
-    result = result.replace("{stats_section}", stats_html)
-    result = result.replace("{content}", content_html)
+    # Fill in the header placeholders in one pass; the content is written between
+    # the two template halves instead of being substituted into one big string.
+    # Placeholders are {name} rather than str.format fields to avoid issues with CSS braces
+    head, _, tail = html_template.partition("{content}")
+    placeholders = {
+        "title": html_escape(title),
+        "summary": html_escape(summary),
+        "session_id": html_escape(session_id),
+        "short_id": html_escape(session_id[:8] if len(session_id) > 8 else session_id),
+        "project_dir": html_escape(project_dir),
+        "created": formatted_created,
+        "timestamp": formatted_timestamp,
+        "stats_section": stats_html,
+    }
+    head = HTML_PLACEHOLDER_RE.sub(lambda m: placeholders[m.group(1)], head)
+
+    return iter_html_document(head, content_parts, tail), summary
 
-    return result, summary
+
+def iter_html_document(head, content_parts, tail):
+    """Yield an HTML document in pieces so it can be written without joining it first."""
+    yield head
+    yield from content_parts
+    yield tail
 
 
 def get_output_directory(project_dir, config):
@@ -1485,14 +1825,22 @@ def get_output_directory(project_dir, config):
         return Path(project_dir) / output_subdir
 
 
+# Patterns used by slugify and extract_created_date, compiled once at import
+SLUG_SPECIAL_CHARS_RE = re.compile(r'[^\w\s-]')
+SLUG_SEPARATORS_RE = re.compile(r'[\s_]+')
+SLUG_HYPHENS_RE = re.compile(r'-+')
+HTML_HEADER_SCAN_CHUNK_SIZE = 16 * 1024
+CREATED_DATE_RE = re.compile(r'<strong>Created(?: \(UTC\))?:</strong>\s*([^<]+)')
+
+
 def slugify(text, max_length=50):
     """Convert text to URL-friendly slug."""
     # Convert to lowercase and replace spaces with hyphens
     slug = text.lower().strip()
-    slug = re.sub(r'[^\w\s-]', '', slug)  # Remove special chars
-    slug = re.sub(r'[\s_]+', '-', slug)   # Replace spaces/underscores with hyphens
-    slug = re.sub(r'-+', '-', slug)       # Remove multiple hyphens
-    slug = slug.strip('-')                # Remove leading/trailing hyphens
+    slug = SLUG_SPECIAL_CHARS_RE.sub('', slug)  # Remove special chars
+    slug = SLUG_SEPARATORS_RE.sub('-', slug)    # Replace spaces/underscores with hyphens
+    slug = SLUG_HYPHENS_RE.sub('-', slug)       # Remove multiple hyphens
+    slug = slug.strip('-')                      # Remove leading/trailing hyphens
     return slug[:max_length]
 
 
@@ -1501,24 +1849,53 @@ def find_existing_session_files(output_dir, short_id):
     # Match both formats:
     # - New format: {session_id}_{summary}.html (e.g., b8d52f27_implementing-auth.html)
     # - Legacy format: {timestamp}_{session_id}.html (e.g., 20240204_182953_b8d52f27.html)
-    html_files = glob.glob(str(output_dir / f"{short_id}_*.html"))
-    html_files += glob.glob(str(output_dir / f"*_{short_id}.html"))
-    jsonl_files = glob.glob(str(output_dir / f"{short_id}_*.jsonl"))
-    jsonl_files += glob.glob(str(output_dir / f"*_{short_id}.jsonl"))
-    # Remove duplicates while preserving order
-    html_files = list(dict.fromkeys(html_files))
-    jsonl_files = list(dict.fromkeys(jsonl_files))
+    # One directory scan; new-format matches come before legacy ones, as the
+    # separate glob patterns used to return them
+    prefix = f"{short_id}_"
+    html_suffix = f"_{short_id}.html"
+    jsonl_suffix = f"_{short_id}.jsonl"
+    html_new, html_legacy, jsonl_new, jsonl_legacy = [], [], [], []
+    try:
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.html'):
+                    if name.startswith(prefix):
+                        html_new.append(name)
+                    elif name.endswith(html_suffix) and not name.startswith('.'):
+                        html_legacy.append(name)
+                elif name.endswith('.jsonl'):
+                    if name.startswith(prefix):
+                        jsonl_new.append(name)
+                    elif name.endswith(jsonl_suffix) and not name.startswith('.'):
+                        jsonl_legacy.append(name)
+    except OSError:
+        return [], []
+    html_files = [str(output_dir / name) for name in html_new + html_legacy]
+    jsonl_files = [str(output_dir / name) for name in jsonl_new + jsonl_legacy]
     return html_files, jsonl_files
 
 
 def extract_created_date(html_path):
-    """Extract the 'Created' date from an existing HTML file."""
+    """
+    Extract the 'Created' date from an existing HTML file.
+    Only the header is read: the file is scanned in chunks until the date is
+    found or the conversation content (<main>) begins.
+    """
     try:
         with open(html_path, 'r') as f:
-            content = f.read()
-        match = re.search(r'<strong>Created(?: \(UTC\))?:</strong>\s*([^<]+)', content)
-        if match:
-            return match.group(1).strip()
+            head = ""
+            match = None
+            for chunk in iter(partial(f.read, HTML_HEADER_SCAN_CHUNK_SIZE), ''):
+                head += chunk
+                match = CREATED_DATE_RE.search(head)
+                # The date runs up to the next tag; make sure that was read too
+                if match and match.end() < len(head):
+                    return match.group(1).strip()
+                if "<main>" in head:
+                    break
+            if match:
+                return match.group(1).strip()
     except:
         pass
     return None
@@ -1529,9 +1906,15 @@ def update_sessions_index(index_path, short_id, html_filename, jsonl_filename, t
     entries = {}
     header_lines = []
 
-    if index_path.exists():
-        with open(index_path, 'r') as f:
-            lines = f.readlines()
+    # Sessions from the same project may be exported concurrently (batch
+    # export, or a batch export racing the SessionEnd hook), so hold an
+    # exclusive lock on the index for the whole read-modify-write.
+    with open(index_path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+        f.seek(0)
+        lines = f.readlines()
 
         in_table = False
         for line in lines:
@@ -1541,18 +1924,21 @@ def update_sessions_index(index_path, short_id, html_filename, jsonl_filename, t
             elif line.startswith('|---'):
                 header_lines.append(line)
             elif line.startswith('|') and in_table:
-                parts = [p.strip() for p in line.split('|')[1:-1]]
-                if len(parts) >= 2:
-                    existing_id = parts[1].strip('` ')
-                    entries[existing_id] = line
+                # Only the Session ID column is needed; rows with fewer than
+                # three pipes have no such column and are dropped
+                fields = line.split('|', 3)
+                if len(fields) == 4:
+                    entries[fields[2].strip().strip('` ')] = line
             elif not in_table:
                 header_lines.append(line)
 
-    # Include summary in the entry
-    new_entry = f"| {timestamp} | `{short_id}` | {project_name} | {summary} | [{html_filename}](./{html_filename}) |\n"
-    entries[short_id] = new_entry
+        # Include summary in the entry
+        new_entry = f"| {timestamp} | `{short_id}` | {project_name} | {summary} | [{html_filename}](./{html_filename}) |\n"
+        entries[short_id] = new_entry
+
+        f.seek(0)
+        f.truncate()
 
-    with open(index_path, 'w') as f:
         if header_lines:
             # Check if header has summary column, if not, update it
             if 'Summary' not in header_lines[0]:
@@ -1565,20 +1951,55 @@ def update_sessions_index(index_path, short_id, html_filename, jsonl_filename, t
         else:
             f.writelines(header_lines)
 
-        for entry in sorted(entries.values(), reverse=True):
-            f.write(entry)
+        f.writelines(sorted(entries.values(), reverse=True))
 
 
-def main():
-    # Load configuration
-    config = load_config()
+def copy_transcript(src, dst):
+    """
+    Copy a raw transcript next to its export, keeping its mode and times.
+    Uses os.copy_file_range where available so the kernel copies the data
+    (or reflinks it on copy-on-write filesystems), else shutil.copy2.
+    """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                # Copy until the source is exhausted, not just the size seen
+                # up front, so bytes appended meanwhile are kept as well
+                while True:
+                    copied = copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                             max(remaining, TRANSCRIPT_COPY_CHUNK_SIZE))
+                    if not copied:
+                        break
+                    remaining -= copied
+                st = os.fstat(fsrc.fileno())
+            # Some filesystems report 0 before the end of the file, and a
+            # transcript can shrink mid-copy; let shutil.copy2 redo it then
+            if remaining <= 0:
+                os.chmod(dst, st.st_mode & 0o7777)
+                os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+                return
+        except OSError:
+            # Unsupported by this kernel or filesystem pair
+            pass
+    import shutil
+    shutil.copy2(src, dst)
 
-    # Read hook input from stdin
-    try:
-        hook_input = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
-        print(f"Error parsing hook input: {e}", file=sys.stderr)
-        sys.exit(1)
+
+def process_session(hook_input, config=None):
+    """
+    Export a single session described by SessionEnd hook input.
+
+    Entry point shared by the hook (via main) and export-all-sessions.py,
+    which imports this module and calls it directly instead of spawning a
+    new interpreter per session.
+
+    Returns the path of the written HTML export, or None if nothing was
+    exported.
+    """
+    if config is None:
+        config = load_config()
 
     session_id = hook_input.get("session_id", "unknown")
     transcript_path = hook_input.get("transcript_path", "")
@@ -1586,11 +2007,11 @@ def main():
 
     if not transcript_path or not os.path.exists(transcript_path):
         print(f"Transcript not found: {transcript_path}", file=sys.stderr)
-        sys.exit(0)
+        return None
 
     if not project_dir:
         print("No project directory provided", file=sys.stderr)
-        sys.exit(0)
+        return None
 
     # Get output directory (central or per-project)
     output_dir = get_output_directory(project_dir, config)
@@ -1625,9 +2046,11 @@ def main():
         html_filename = None
         print("Creating new export...")
 
+    exported_path = None
+
     # Generate HTML content and summary first (needed for filename)
     try:
-        html_content, summary = convert_to_html(transcript_path, project_dir, session_id, config, created_date)
+        html_parts, summary = convert_to_html(transcript_path, project_dir, session_id, config, created_date)
 
         # Generate filename if new session
         if html_filename is None:
@@ -1648,8 +2071,11 @@ def main():
         jsonl_filename = html_filename.replace('.html', '.jsonl')
         jsonl_path = output_dir / jsonl_filename
 
-        with open(html_path, 'w') as f:
-            f.write(html_content)
+        # Encode straight to UTF-8 (the charset the page declares) and skip
+        # the text-mode wrapper
+        with open(html_path, 'wb', buffering=HTML_WRITE_BUFFER_SIZE) as f:
+            f.writelines(part.encode('utf-8') for part in html_parts)
+        exported_path = str(html_path)
         print(f"Exported conversation to: {html_path}")
         print(f"Summary: {summary}")
     except Exception as e:
@@ -1663,8 +2089,7 @@ def main():
         jsonl_path = output_dir / jsonl_filename
 
     try:
-        import shutil
-        shutil.copy2(transcript_path, jsonl_path)
+        copy_transcript(transcript_path, jsonl_path)
         print(f"Copied raw transcript to: {jsonl_path}")
     except Exception as e:
         print(f"Error copying JSONL: {e}", file=sys.stderr)
@@ -1677,6 +2102,21 @@ def main():
     except Exception as e:
         print(f"Error updating index: {e}", file=sys.stderr)
 
+    return exported_path
+
+
+def main():
+    # Load configuration
+    config = load_config()
+
+    # Read hook input from stdin
+    try:
+        hook_input = json.load(sys.stdin)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing hook input: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    process_session(hook_input, config)
 
 
 if __name__ == "__main__":
@@ -5,16 +5,21 @@ Export Codex CLI conversations to HTML and Markdown with collapsible tool detail
 """
 
 import argparse
-import glob
 import html
 import json
 import os
 import re
 import sys
-from collections import Counter
+from collections import Counter, namedtuple
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 
 DEFAULT_CONFIG = {
     "user_name": "You",
@@ -44,7 +49,7 @@ DEFAULT_CONFIG = {
     "time_format": "%H:%M:%S",
 }
 
-STOP_WORDS = {
+STOP_WORDS = frozenset({
     "i", "me", "my", "we", "our", "you", "your", "the", "a", "an", "is", "are",
     "was", "were", "be", "been", "being", "have", "has", "had", "do", "does",
     "did", "will", "would", "could", "should", "may", "might", "must", "shall",
@@ -53,11 +58,68 @@ STOP_WORDS = {
     "under", "again", "further", "then", "once", "here", "there", "when", "where",
     "why", "how", "all", "each", "few", "more", "most", "other", "some", "such",
     "no", "nor", "not", "only", "own", "same", "so", "than", "too", "very",
-    "just", "and", "but", "if", "or", "because", "as", "until", "while", "of",
+    "just", "and", "but", "if", "or", "because", "until", "while",
     "this", "that", "these", "those", "am", "it", "its", "also", "about", "like",
     "want", "need", "please", "help", "make", "get", "let", "see", "look", "thing",
     "something", "anything", "everything", "nothing", "use", "using", "used",
-}
+})
+
+# Regexes used by generate_summary, compiled once at import
+CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+URL_RE = re.compile(r"https?://\S+")
+PATH_RE = re.compile(r"/[\w/.-]+")
+BACKTICK_RE = re.compile(r"`[^`]+`")
+SUMMARY_WORD_RE = re.compile(r"\b[a-z]{3,}\b")
+
+# Maps every ASCII character that is not a regex word character to a space,
+# so str.split() yields the same word runs SUMMARY_WORD_RE sees for ASCII text
+ASCII_WORD_SPLIT_TABLE = str.maketrans({
+    chr(c): " " for c in range(128) if not (chr(c).isalnum() or chr(c) == "_")
+})
+# Action patterns looked for in the first user message, in priority order.
+# Each pattern is paired with its trigger verbs so it is only searched when
+# one of them appears as a whole word in the message.
+ACTION_VERBS = [
+    ("building", ("create", "build", "make", "develop", "implement")),
+    ("fixing", ("fix", "debug", "solve", "resolve")),
+    ("adding", ("add", "integrate", "include")),
+    ("updating", ("update", "modify", "change", "edit")),
+    ("setting up", ("setup", "configure", "install")),
+    ("exporting", ("export", "convert", "transform")),
+    ("testing", ("test", "verify", "check")),
+    ("improving", ("refactor", "optimize", "improve")),
+]
+ACTION_PATTERNS = [
+    (re.compile(r"\b(" + "|".join(verbs) + r")\b.*?\b(\w+)"), action, frozenset(verbs))
+    for action, verbs in ACTION_VERBS
+]
+WORD_RUN_RE = re.compile(r"\w+")
+
+# Markdown constructs recognised in message content, matched in a single pass.
+# Fenced blocks and inline code are kept verbatim; headers and bold text can
+# contain inline code and bold, handled by MD_INLINE_RE.
+MD_BLOCK_RE = re.compile(
+    r"(?P<fence>```\w*\n(?s:.*?)```)"
+    r"|(?P<code>`[^`]+`)"
+    r"|(?P<h3>^### .+$)"
+    r"|(?P<h2>^## .+$)"
+    r"|(?P<bold>\*\*.+?\*\*)",
+    re.MULTILINE,
+)
+MD_INLINE_RE = re.compile(r"(?P<code>`[^`]+`)|(?P<bold>\*\*.+?\*\*)")
+
+# Markdown export blocks, one per event kind; render_markdown joins them with
+# newlines, so each ends with the blank line that separates it from the next
+MD_MESSAGE_TEMPLATE = "## {role} {ts}\n\n{text}\n"
+MD_TOOL_CALL_TEMPLATE = "### tool_call {name} {ts}\n\n```json\n{args}\n```\n"
+MD_TOOL_OUTPUT_TEMPLATE = "### tool_output {ts}\n\n```\n{output}\n```\n"
+
+# Exports of long sessions run to megabytes, so write them through a larger
+# buffer to keep the number of write() syscalls down
+HTML_WRITE_BUFFER_SIZE = 1024 * 1024
+# Session logs run to megabytes as well; read them in large chunks too
+JSONL_READ_BUFFER_SIZE = 1024 * 1024
+
 
 THEMES = {
     "dark": {
@@ -205,8 +267,8 @@ def load_config():
 def generate_summary(conversation, project_name, max_words=5):
     user_texts = []
     for msg in conversation[:10]:
-        if msg["type"] == "user":
-            user_texts.append(msg["content"])
+        if msg.type == "user":
+            user_texts.append(msg.content)
             if len(user_texts) >= 5:
                 break
 
@@ -214,33 +276,37 @@ def generate_summary(conversation, project_name, max_words=5):
         return f"{project_name} session"
 
     combined_text = " ".join(user_texts).lower()
-    combined_text = re.sub(r"```.*?```", "", combined_text, flags=re.DOTALL)
-    combined_text = re.sub(r"https?://\S+", "", combined_text)
-    combined_text = re.sub(r"/[\w/.-]+", "", combined_text)
-    combined_text = re.sub(r"`[^`]+`", "", combined_text)
-
-    words = re.findall(r"\b[a-z]{3,}\b", combined_text)
-    meaningful_words = [w for w in words if w not in STOP_WORDS]
-    word_counts = Counter(meaningful_words)
+    combined_text = CODE_FENCE_RE.sub("", combined_text)
+    combined_text = URL_RE.sub("", combined_text)
+    combined_text = PATH_RE.sub("", combined_text)
+    combined_text = BACKTICK_RE.sub("", combined_text)
+
+    # ASCII tokens are whole word runs, so they match when they are 3+ letters;
+    # only tokens with non-ASCII characters need the regex
+    words = []
+    for token in combined_text.translate(ASCII_WORD_SPLIT_TABLE).split():
+        if token.isascii():
+            if len(token) >= 3 and token.isalpha():
+                words.append(token)
+        else:
+            words.extend(SUMMARY_WORD_RE.findall(token))
+    word_counts = Counter(w for w in words if w not in STOP_WORDS)
     top_words = [word for word, _ in word_counts.most_common(max_words)]
 
     if not top_words:
         return f"{project_name} session"
 
     first_msg = user_texts[0].lower()
-    action_patterns = [
-        (r"\b(create|build|make|develop|implement)\b.*?\b(\w+)", "building"),
-        (r"\b(fix|debug|solve|resolve)\b.*?\b(\w+)", "fixing"),
-        (r"\b(add|integrate|include)\b.*?\b(\w+)", "adding"),
-        (r"\b(update|modify|change|edit)\b.*?\b(\w+)", "updating"),
-        (r"\b(setup|configure|install)\b.*?\b(\w+)", "setting up"),
-        (r"\b(export|convert|transform)\b.*?\b(\w+)", "exporting"),
-        (r"\b(test|verify|check)\b.*?\b(\w+)", "testing"),
-        (r"\b(refactor|optimize|improve)\b.*?\b(\w+)", "improving"),
-    ]
-
-    for pattern, action in action_patterns:
-        match = re.search(pattern, first_msg)
+    first_words = set()
+    for token in first_msg.translate(ASCII_WORD_SPLIT_TABLE).split():
+        if token.isascii():
+            first_words.add(token)
+        else:
+            first_words.update(WORD_RUN_RE.findall(token))
+    for pattern, action, verbs in ACTION_PATTERNS:
+        if first_words.isdisjoint(verbs):
+            continue
+        match = pattern.search(first_msg)
         if match:
             keywords = " ".join(top_words[:3])
             return f"{action} {keywords}".title()
@@ -249,32 +315,107 @@ def generate_summary(conversation, project_name, max_words=5):
     return summary.title() if summary else f"{project_name} session"
 
 
-def get_html_template(theme_name, config):
-    custom_colors = config.get("custom_colors") or {}
-    is_auto = theme_name == "auto"
+# Dark/light toggle script appended to every HTML export
+THEME_TOGGLE_JS = """
+    <script>
+    (function() {
+        const root = document.documentElement;
+        const STORAGE_KEY = 'codex-theme';
 
-    meta_items = []
-    if config.get("show_summary", True):
-        meta_items.append('<p><strong>Summary:</strong> {summary}</p>')
-    if config.get("show_session_id", True):
-        meta_items.append('<p><strong>Session ID:</strong> <code>{session_id}</code></p>')
-    if config.get("show_project_path", True):
-        meta_items.append('<p><strong>Project:</strong> <code>{project_dir}</code></p>')
-    if config.get("show_timestamp", True):
-        meta_items.append('<p><strong>Created (UTC):</strong> {created}</p>')
-        meta_items.append('<p><strong>Last Updated (UTC):</strong> {timestamp}</p>')
-    meta_items.append('<p class="tip"><em>Tip: You can rename this file (keep the <code>{short_id}_</code> prefix) and it will be preserved on resume.</em></p>')
-    meta_items.append('{stats_section}')
+        const themes = {
+            dark: {
+                'bg-color': '#1e1e2e',
+                'card-bg': '#1a1a2e',
+                'user-bg': '#1a365d',
+                'assistant-bg': '#1e1e2e',
+                'text-color': '#f0f0f0',
+                'text-muted': '#b8b8c8',
+                'accent': '#f06292',
+                'accent-soft': '#7c6bba',
+                'border-color': '#3a3a5a',
+                'code-bg': '#141422',
+                'tool-bg': '#1a2535'
+            },
+            light: {
+                'bg-color': '#fafafa',
+                'card-bg': '#ffffff',
+                'user-bg': '#e8f4fc',
+                'assistant-bg': '#ffffff',
+                'text-color': '#2d2d2d',
+                'text-muted': '#5a5a6a',
+                'accent': '#2563eb',
+                'accent-soft': '#7c3aed',
+                'border-color': '#e2e2e8',
+                'code-bg': '#f4f4f8',
+                'tool-bg': '#f8f8fc'
+            }
+        };
 
-    meta_html = "\n            ".join(meta_items) if meta_items else ""
+        function getPreferredTheme() {
+            const stored = localStorage.getItem(STORAGE_KEY);
+            if (stored) return stored;
+            return window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
+        }
+
+        function applyTheme(theme) {
+            const colors = themes[theme];
+            for (const [prop, value] of Object.entries(colors)) {
+                root.style.setProperty(`--${prop}`, value);
+            }
+            updateToggleButton(theme);
+        }
+
+        function updateToggleButton(theme) {
+            const btn = document.getElementById('theme-toggle');
+            if (btn) {
+                btn.innerHTML = theme === 'dark' ? '☀️ Light' : '🌙 Dark';
+            }
+        }
+
+        function toggleTheme() {
+            const current = localStorage.getItem(STORAGE_KEY) || getPreferredTheme();
+            const next = current === 'dark' ? 'light' : 'dark';
+            localStorage.setItem(STORAGE_KEY, next);
+            applyTheme(next);
+        }
+
+        document.addEventListener('DOMContentLoaded', function() {
+            applyTheme(getPreferredTheme());
+            const btn = document.getElementById('theme-toggle');
+            if (btn) {
+                btn.addEventListener('click', toggleTheme);
+            }
+        });
+
+        window.matchMedia('(prefers-color-scheme: dark)').addEventListener('change', function(e) {
+            if (!localStorage.getItem(STORAGE_KEY)) {
+                applyTheme(e.matches ? 'dark' : 'light');
+            }
+        });
+    })();
+    </script>
+    """
 
-    def apply_custom(theme_dict):
-        result = theme_dict.copy()
-        result.update(custom_colors)
-        return result
 
-    def theme_to_css_vars(theme):
-        return f"""
+def get_html_template(theme_name, config):
+    custom_colors = config.get("custom_colors") or {}
+    return build_html_template(
+        theme_name,
+        tuple(sorted(custom_colors.items())),
+        config.get("font_size", "16px"),
+        config.get("line_height", "1.75"),
+        config.get("letter_spacing", "0.01em"),
+        config.get("padding", "24px"),
+        config.get("max_width", "920px"),
+        bool(config.get("show_summary", True)),
+        bool(config.get("show_session_id", True)),
+        bool(config.get("show_project_path", True)),
+        bool(config.get("show_timestamp", True)),
+    )
+
+
+def theme_to_css_vars(theme):
+    return f"""
             --bg-color: {theme["bg_color"]};
             --card-bg: {theme["card_bg"]};
             --user-bg: {theme["user_bg"]};
@@ -287,24 +428,59 @@ def get_html_template(theme_name, config):
             --code-bg: {theme["code_bg"]};
             --tool-bg: {theme["tool_bg"]};"""
 
+
+# CSS variable blocks for each built-in theme, used when no custom colors are set
+THEME_CSS_VARS = {name: theme_to_css_vars(theme) for name, theme in THEMES.items()}
+AUTO_THEME_DARK_CSS_VARS = theme_to_css_vars(AUTO_THEME_DARK)
+AUTO_THEME_LIGHT_CSS_VARS = theme_to_css_vars(AUTO_THEME_LIGHT)
+
+
+# The template only depends on the theme and a handful of layout options,
+# so it is built once per distinct combination
+@lru_cache(maxsize=32)
+def build_html_template(theme_name, custom_colors, font_size, line_height, letter_spacing,
+                        padding, max_width, show_summary, show_session_id, show_project_path,
+                        show_timestamp):
+    custom_colors = dict(custom_colors)
+    is_auto = theme_name == "auto"
+
+    meta_items = []
+    if show_summary:
+        meta_items.append('<p><strong>Summary:</strong> {summary}</p>')
+    if show_session_id:
+        meta_items.append('<p><strong>Session ID:</strong> <code>{session_id}</code></p>')
+    if show_project_path:
+        meta_items.append('<p><strong>Project:</strong> <code>{project_dir}</code></p>')
+    if show_timestamp:
+        meta_items.append('<p><strong>Created (UTC):</strong> {created}</p>')
+        meta_items.append('<p><strong>Last Updated (UTC):</strong> {timestamp}</p>')
+    meta_items.append('<p class="tip"><em>Tip: You can rename this file (keep the <code>{short_id}_</code> prefix) and it will be preserved on resume.</em></p>')
+    meta_items.append('{stats_section}')
+
+    meta_html = "\n            ".join(meta_items) if meta_items else ""
+
+    def css_vars_for(theme, precomputed):
+        if not custom_colors:
+            return precomputed
+        return theme_to_css_vars({**theme, **custom_colors})
+
     if is_auto:
-        dark_theme = apply_custom(AUTO_THEME_DARK)
-        light_theme = apply_custom(AUTO_THEME_LIGHT)
         css_vars = f"""
         :root {{
-            {theme_to_css_vars(light_theme)}
+            {css_vars_for(AUTO_THEME_LIGHT, AUTO_THEME_LIGHT_CSS_VARS)}
         }}
 
         @media (prefers-color-scheme: dark) {{
             :root {{
-                {theme_to_css_vars(dark_theme)}
+                {css_vars_for(AUTO_THEME_DARK, AUTO_THEME_DARK_CSS_VARS)}
             }}
         }}"""
     else:
-        theme = apply_custom(THEMES.get(theme_name, THEMES["dark"]))
+        if theme_name not in THEMES:
+            theme_name = "dark"
         css_vars = f"""
         :root {{
-            {theme_to_css_vars(theme)}
+            {css_vars_for(THEMES[theme_name], THEME_CSS_VARS[theme_name])}
         }}"""
 
     css = css_vars + f"""
@@ -316,12 +492,12 @@ def get_html_template(theme_name, config):
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
             background-color: var(--bg-color);
             color: var(--text-color);
-            font-size: {config.get("font_size", "16px")};
-            line-height: {config.get("line_height", "1.75")};
-            letter-spacing: {config.get("letter_spacing", "0.01em")};
+            font-size: {font_size};
+            line-height: {line_height};
+            letter-spacing: {letter_spacing};
             margin: 0;
-            padding: {config.get("padding", "24px")};
-            max-width: {config.get("max_width", "920px")};
+            padding: {padding};
+            max-width: {max_width};
             margin: 0 auto;
         }}
 
@@ -536,86 +712,6 @@ def get_html_template(theme_name, config):
         }}
     """
 
-    theme_toggle_js = """
-    <script>
-    (function() {
-        const root = document.documentElement;
-        const STORAGE_KEY = 'codex-theme';
-
-        const themes = {
-            dark: {
-                'bg-color': '#1e1e2e',
-                'card-bg': '#1a1a2e',
-                'user-bg': '#1a365d',
-                'assistant-bg': '#1e1e2e',
-                'text-color': '#f0f0f0',
-                'text-muted': '#b8b8c8',
-                'accent': '#f06292',
-                'accent-soft': '#7c6bba',
-                'border-color': '#3a3a5a',
-                'code-bg': '#141422',
-                'tool-bg': '#1a2535'
-            },
-            light: {
-                'bg-color': '#fafafa',
-                'card-bg': '#ffffff',
-                'user-bg': '#e8f4fc',
-                'assistant-bg': '#ffffff',
-                'text-color': '#2d2d2d',
-                'text-muted': '#5a5a6a',
-                'accent': '#2563eb',
-                'accent-soft': '#7c3aed',
-                'border-color': '#e2e2e8',
-                'code-bg': '#f4f4f8',
-                'tool-bg': '#f8f8fc'
-            }
-        };
-
-        function getPreferredTheme() {
-            const stored = localStorage.getItem(STORAGE_KEY);
-            if (stored) return stored;
-            return window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
-        }
-
-        function applyTheme(theme) {
-            const colors = themes[theme];
-            for (const [prop, value] of Object.entries(colors)) {
-                root.style.setProperty(`--${prop}`, value);
-            }
-            updateToggleButton(theme);
-        }
-
-        function updateToggleButton(theme) {
-            const btn = document.getElementById('theme-toggle');
-            if (btn) {
-                btn.innerHTML = theme === 'dark' ? '☀️ Light' : '🌙 Dark';
-            }
-        }
-
-        function toggleTheme() {
-            const current = localStorage.getItem(STORAGE_KEY) || getPreferredTheme();
-            const next = current === 'dark' ? 'light' : 'dark';
-            localStorage.setItem(STORAGE_KEY, next);
-            applyTheme(next);
-        }
-
-        document.addEventListener('DOMContentLoaded', function() {
-            applyTheme(getPreferredTheme());
-            const btn = document.getElementById('theme-toggle');
-            if (btn) {
-                btn.addEventListener('click', toggleTheme);
-            }
-        });
-
-        window.matchMedia('(prefers-color-scheme: dark)').addEventListener('change', function(e) {
-            if (!localStorage.getItem(STORAGE_KEY)) {
-                applyTheme(e.matches ? 'dark' : 'light');
-            }
-        });
-    })();
-    </script>
-    """
-
     html_tpl = """<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -639,31 +735,52 @@ def get_html_template(theme_name, config):
     <main>
 {content}
     </main>
-""" + theme_toggle_js + """
+""" + THEME_TOGGLE_JS + """
 </body>
 </html>
 """
     return html_tpl
 
 
+# Strings shorter than this (tool labels, ids, paths) recur across a session
+# and are escaped through a cache; longer ones go straight to html.escape
+ESCAPE_CACHE_MAX_LENGTH = 256
+
+
+@lru_cache(maxsize=4096)
+def escape_short_html(text):
+    return html.escape(text)
+
+
 def escape_html(text):
     if not text:
         return ""
-    return html.escape(str(text))
+    text = str(text)
+    if len(text) < ESCAPE_CACHE_MAX_LENGTH:
+        return escape_short_html(text)
+    return html.escape(text)
+
 
+@lru_cache(maxsize=8192)
+def parse_iso_timestamp(ts):
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
 
-def format_timestamp(ts, config):
+
+@lru_cache(maxsize=4096)
+def format_timestamp_as(ts, time_format):
     if not ts:
         return ""
     try:
-        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-        return dt.strftime(config.get("time_format", "%H:%M:%S"))
+        return parse_iso_timestamp(ts).strftime(time_format)
     except ValueError:
         return ts[:19] if len(ts) >= 19 else ts
 
 
 def format_tool_call(tool_name, tool_input, config):
     max_length = config.get("max_tool_input_length", 500)
+    if max_length == 0:
+        # A zero limit hides the body, so skip truncating and escaping it
+        return ""
     content = tool_input
     if len(content) > max_length:
         content = content[:max_length] + "..."
@@ -672,26 +789,36 @@ def format_tool_call(tool_name, tool_input, config):
 
 def format_tool_output(tool_output, config):
     max_length = config.get("max_tool_result_length", 1000)
+    if max_length == 0:
+        # A zero limit hides the body, so skip truncating and escaping it
+        return ""
     content = tool_output
     if len(content) > max_length:
         content = content[:max_length] + "..."
     return f"<pre><code>{escape_html(content)}</code></pre>"
 
 
+TOOL_ITEM_HTML = """
+                <div class="tool-item">
+                    <h4>{label}</h4>
+                    {input_html}
+                    {output_html}
+                </div>
+"""
+
+
 def render_tools_section(tools, config):
     if not tools:
         return ""
 
-    tool_items_html = ""
-    for tool in tools:
-        label = tool.get("label", "tool")
-        tool_items_html += f"""
-                <div class="tool-item">
-                    <h4>{escape_html(label)}</h4>
-                    {tool.get("input_html", "")}
-                    {tool.get("output_html", "")}
-                </div>
-"""
+    tool_items_html = "".join([
+        TOOL_ITEM_HTML.format(
+            label=escape_html(tool.label),
+            input_html=tool.input_html,
+            output_html=tool.output_html,
+        )
+        for tool in tools
+    ])
 
     return f"""
             <details class="tools-container">
@@ -703,32 +830,76 @@ def render_tools_section(tools, config):
 """
 
 
-def render_message(msg, config):
-    msg_type = msg["type"]
-    timestamp = format_timestamp(msg["timestamp"], config)
-    content = msg["content"]
-    tools = msg.get("tools", [])
-
-    user_emoji = config.get("user_emoji", "👤")
-    assistant_emoji = config.get("assistant_emoji", "🤖")
+def render_markdown_html(text, pattern=MD_BLOCK_RE):
+    # Most messages have no markdown at all; every construct needs a backtick,
+    # "**" or "## ", so without those there is nothing for the regex to find
+    if "`" not in text and "**" not in text and "## " not in text:
+        return html.escape(text)
+
+    # Escape the text between markdown constructs as it is emitted; each
+    # construct escapes its own contents
+    parts = []
+    pos = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        if start > pos:
+            parts.append(html.escape(text[pos:start]))
+        parts.append(render_markdown_match(match))
+        pos = match.end()
+    parts.append(html.escape(text[pos:]))
+    return "".join(parts)
+
+
+def render_markdown_match(match):
+    kind = match.lastgroup
+    text = match.group()
+    if kind == "fence":
+        # Drop the opening ```lang line and the closing fence
+        body = text[text.index("\n") + 1:-3]
+        return f"<pre><code>{html.escape(body)}</code></pre>"
+    if kind == "code":
+        return f"<code>{html.escape(text[1:-1])}</code>"
+    if kind == "h3":
+        return f"<h3>{render_markdown_html(text[4:], MD_INLINE_RE)}</h3>"
+    if kind == "h2":
+        return f"<h2>{render_markdown_html(text[3:], MD_INLINE_RE)}</h2>"
+    return f"<strong>{render_markdown_html(text[2:-2], MD_INLINE_RE)}</strong>"
+
+
+# Per-export values render_message needs, read from the config once
+RenderContext = namedtuple("RenderContext", "user_label assistant_label time_format")
+
+
+def get_render_context(config):
+    return RenderContext(
+        f"{config.get('user_emoji', '👤')} {config['user_name']}",
+        f"{config.get('assistant_emoji', '🤖')} {config['assistant_name']}",
+        config.get("time_format", "%H:%M:%S"),
+    )
+
+
+def render_message(msg, config, ctx=None):
+    # convert_to_html builds the context once per export and passes it in
+    if ctx is None:
+        ctx = get_render_context(config)
+
+    msg_type = msg.type
+    timestamp = format_timestamp_as(msg.timestamp, ctx.time_format)
+    content = msg.content
+    tools = msg.tools
 
     if msg_type == "user":
         role_class = "user"
-        role_label = f"{user_emoji} {config['user_name']}"
+        role_label = ctx.user_label
         header_class = "user-role"
     else:
         role_class = "assistant"
-        role_label = f"{assistant_emoji} {config['assistant_name']}"
+        role_label = ctx.assistant_label
         header_class = "assistant-role"
 
     tools_html = render_tools_section(tools, config)
 
-    content_html = escape_html(content)
-    content_html = re.sub(r"```(\w*)\n(.*?)```", r"<pre><code>\2</code></pre>", content_html, flags=re.DOTALL)
-    content_html = re.sub(r"`([^`]+)`", r"<code>\1</code>", content_html)
-    content_html = re.sub(r"^### (.+)$", r"<h3>\1</h3>", content_html, flags=re.MULTILINE)
-    content_html = re.sub(r"^## (.+)$", r"<h2>\1</h2>", content_html, flags=re.MULTILINE)
-    content_html = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", content_html)
+    content_html = render_markdown_html(content)
     content_html = content_html.replace("\n\n", "</p><p>")
     content_html = f"<p>{content_html}</p>" if content_html else ""
 
@@ -775,10 +946,12 @@ def render_stats_section(stats, config):
         return ""
 
     duration_str = format_duration(stats.get("duration_seconds"))
-    total_input = format_token_count(stats.get("total_input_tokens", 0))
-    total_output = format_token_count(stats.get("total_output_tokens", 0))
+    input_tokens = stats.get("total_input_tokens", 0)
+    output_tokens = stats.get("total_output_tokens", 0)
+    total_input = format_token_count(input_tokens)
+    total_output = format_token_count(output_tokens)
     cache_read = format_token_count(stats.get("cache_read_tokens", 0))
-    total_tokens = stats.get("total_input_tokens", 0) + stats.get("total_output_tokens", 0)
+    total_tokens = format_token_count(input_tokens + output_tokens)
     total_messages = stats.get("user_messages", 0) + stats.get("assistant_messages", 0)
 
     tool_usage = stats.get("tool_usage", Counter())
@@ -798,7 +971,7 @@ def render_stats_section(stats, config):
             <span class="stat-pill">{duration_str}</span>
             <span class="stat-pill">{total_messages} msgs</span>
             <span class="stat-pill">{total_tool_calls} tools</span>
-            <span class="stat-pill">{format_token_count(total_tokens)} tokens</span>
+            <span class="stat-pill">{total_tokens} tokens</span>
         </p>
 """
 
@@ -829,7 +1002,7 @@ def render_stats_section(stats, config):
                             <span class="stat-label">Cache Read:</span> {cache_read}
                         </span>
                         <span class="stat-item">
-                            <span class="stat-label">Total:</span> {format_token_count(total_tokens)}
+                            <span class="stat-label">Total:</span> {total_tokens}
                         </span>
                     </div>
                     <div class="stats-row">
@@ -841,24 +1014,60 @@ def render_stats_section(stats, config):
 """
 
 
+# Records built by parse_session for the HTML view. Long sessions create one
+# per message and per tool call, so they use __slots__ rather than dicts.
+class Message:
+    __slots__ = ("type", "timestamp", "content", "tools")
+
+    def __init__(self, msg_type, timestamp, content):
+        self.type = msg_type
+        self.timestamp = timestamp
+        self.content = content
+        self.tools = []
+
+
+class ToolRecord:
+    __slots__ = ("label", "input_html", "output_html")
+
+    def __init__(self, label, input_html="", output_html=""):
+        self.label = label
+        self.input_html = input_html
+        self.output_html = output_html
+
+
 def parse_session(jsonl_path, config):
     meta = {}
     events = []
     conversation = []
     tool_by_call_id = {}
     pending_tools = []
-    last_assistant_index = None
+    # Tool records go to the latest assistant message, or wait in pending_tools
+    # until the first one arrives
+    tool_sink = pending_tools
     token_totals = {}
+    max_result_length = config.get("max_tool_result_length", 1000)
 
-    with open(jsonl_path, "r", encoding="utf-8") as f:
+    with open(jsonl_path, "rb", buffering=JSONL_READ_BUFFER_SIZE) as f:
         for line in f:
+            # Only session_meta, token_count and response_item records are used,
+            # so skip everything else before paying for a JSON parse
+            if (b'"response_item"' not in line and b'"token_count"' not in line
+                    and b'"session_meta"' not in line):
+                continue
             line = line.strip()
-            if not line:
+            # Every record is a JSON object; anything else (a torn or
+            # garbage line) is skipped without raising a decode error
+            if line[:1] != b"{":
                 continue
             try:
-                obj = json.loads(line)
+                obj = json_loads(line)
             except json.JSONDecodeError:
-                continue
+                # orjson is stricter than json (lone surrogates, NaN), so retry
+                # with the standard parser before dropping the line
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
 
             ts = obj.get("timestamp")
             entry_type = obj.get("type")
@@ -886,19 +1095,22 @@ def parse_session(jsonl_path, config):
             payload_type = payload.get("type")
             if payload_type == "message":
                 role = payload.get("role", "unknown")
-                text = "".join(
-                    [item.get("text", "") for item in payload.get("content", []) if item.get("type") in ("input_text", "output_text")]
-                ).strip()
+                # The set literal is folded into a constant frozenset, and a list
+                # comprehension is faster to join than a generator
+                text = "".join([
+                    item.get("text", "") for item in payload.get("content", ())
+                    if item.get("type") in {"input_text", "output_text"}
+                ]).strip()
                 if text:
                     events.append({"kind": "message", "role": role, "text": text, "ts": ts})
                     msg_type = "assistant" if role != "user" else "user"
-                    msg = {"type": msg_type, "timestamp": ts, "content": text, "tools": []}
+                    msg = Message(msg_type, ts, text)
                     conversation.append(msg)
                     if msg_type == "assistant":
-                        last_assistant_index = len(conversation) - 1
                         if pending_tools:
-                            conversation[last_assistant_index]["tools"].extend(pending_tools)
+                            msg.tools.extend(pending_tools)
                             pending_tools = []
+                        tool_sink = msg.tools
 
             elif payload_type == "function_call":
                 call_id = payload.get("call_id")
@@ -906,41 +1118,25 @@ def parse_session(jsonl_path, config):
                 args = payload.get("arguments", "")
                 events.append({"kind": "tool_call", "name": name, "args": args, "ts": ts, "call_id": call_id})
 
-                tool_obj = {
-                    "label": name,
-                    "input_html": format_tool_call(name, args, config),
-                    "output_html": "",
-                }
+                tool_obj = ToolRecord(name, format_tool_call(name, args, config))
                 if call_id:
                     tool_by_call_id[call_id] = tool_obj
-
-                if last_assistant_index is not None:
-                    conversation[last_assistant_index]["tools"].append(tool_obj)
-                else:
-                    pending_tools.append(tool_obj)
+                tool_sink.append(tool_obj)
 
             elif payload_type == "function_call_output":
                 call_id = payload.get("call_id")
                 output = payload.get("output", "")
-                if output and len(output) > config.get("max_tool_result_length", 1000):
-                    output = output[: config.get("max_tool_result_length", 1000)] + "..."
+                if output and len(output) > max_result_length:
+                    output = output[:max_result_length] + "..."
                 events.append({"kind": "tool_output", "call_id": call_id, "output": output, "ts": ts})
 
                 if call_id and call_id in tool_by_call_id:
-                    tool_by_call_id[call_id]["output_html"] = format_tool_output(output, config)
+                    tool_by_call_id[call_id].output_html = format_tool_output(output, config)
                 else:
-                    tool_obj = {
-                        "label": "tool_output",
-                        "input_html": "",
-                        "output_html": format_tool_output(output, config),
-                    }
-                    if last_assistant_index is not None:
-                        conversation[last_assistant_index]["tools"].append(tool_obj)
-                    else:
-                        pending_tools.append(tool_obj)
+                    tool_sink.append(ToolRecord("tool_output", output_html=format_tool_output(output, config)))
 
     if pending_tools and conversation:
-        conversation[-1]["tools"].extend(pending_tools)
+        conversation[-1].tools.extend(pending_tools)
 
     return meta, events, conversation, token_totals
 
@@ -954,23 +1150,24 @@ def compute_stats(events, token_totals):
 
     for ev in events:
         ts = ev.get("ts")
-        if ts and first_ts is None:
-            first_ts = ts
         if ts:
+            if first_ts is None:
+                first_ts = ts
             last_ts = ts
-        if ev["kind"] == "message":
+        kind = ev["kind"]
+        if kind == "message":
             if ev.get("role") == "user":
                 user_messages += 1
             else:
                 assistant_messages += 1
-        if ev["kind"] == "tool_call":
+        elif kind == "tool_call":
             tool_usage[ev.get("name", "tool")] += 1
 
     duration_seconds = None
     if first_ts and last_ts:
         try:
-            start = datetime.fromisoformat(first_ts.replace("Z", "+00:00"))
-            end = datetime.fromisoformat(last_ts.replace("Z", "+00:00"))
+            start = parse_iso_timestamp(first_ts)
+            end = parse_iso_timestamp(last_ts)
             duration_seconds = (end - start).total_seconds()
         except ValueError:
             duration_seconds = None
@@ -986,8 +1183,19 @@ def compute_stats(events, token_totals):
     }
 
 
-def convert_to_html(jsonl_path, project_dir, session_id, config):
-    meta, events, conversation, token_totals = parse_session(jsonl_path, config)
+# Header placeholders in the HTML template, filled by convert_to_html
+HTML_PLACEHOLDER_RE = re.compile(
+    r"\{(title|summary|session_id|short_id|project_dir|created|timestamp|stats_section)\}"
+)
+
+
+def convert_to_html(jsonl_path, project_dir, session_id, config, parsed=None, now=None):
+    # Callers that already parsed the session pass the parse_session() result
+    # so the transcript is not read and held in memory twice; they can also
+    # pass the export time (an aware UTC datetime) shared with other outputs
+    if parsed is None:
+        parsed = parse_session(jsonl_path, config)
+    meta, events, conversation, token_totals = parsed
     stats = compute_stats(events, token_totals)
 
     project_name = Path(project_dir).name
@@ -997,37 +1205,49 @@ def convert_to_html(jsonl_path, project_dir, session_id, config):
 
     html_template = get_html_template(config.get("theme", "auto"), config)
 
-    content_html = ""
+    ctx = get_render_context(config)
+    content_parts = []
     for msg in conversation:
-        if not msg["content"].strip() and not msg["tools"]:
+        if not msg.content.strip() and not msg.tools:
             continue
-        content_html += render_message(msg, config)
+        content_parts.append(render_message(msg, config, ctx))
 
     date_format = config.get("date_format", "%Y-%m-%d %H:%M:%S")
-    formatted_timestamp = datetime.now(timezone.utc).strftime(date_format)
+    if now is None:
+        now = datetime.now(timezone.utc)
+    formatted_timestamp = now.strftime(date_format)
 
     created = formatted_timestamp
     if meta.get("timestamp"):
         try:
-            dt = datetime.fromisoformat(meta["timestamp"].replace("Z", "+00:00"))
-            created = dt.strftime(date_format)
+            created = parse_iso_timestamp(meta["timestamp"]).strftime(date_format)
         except ValueError:
             created = meta.get("timestamp")
 
     stats_html = render_stats_section(stats, config)
 
-    result = html_template
-    result = result.replace("{title}", escape_html(title))
-    result = result.replace("{summary}", escape_html(summary))
-    result = result.replace("{session_id}", escape_html(session_id))
-    result = result.replace("{short_id}", escape_html(session_id[:8] if session_id else "session"))
-    result = result.replace("{project_dir}", escape_html(project_dir))
-    result = result.replace("{created}", created)
-    result = result.replace("{timestamp}", formatted_timestamp)
-    result = result.replace("{stats_section}", stats_html)
-    result = result.replace("{content}", content_html)
+    # Only the part before {content} has placeholders, filled in one pass; the
+    # messages are streamed between it and the footer instead of being spliced in
+    head, _, tail = html_template.partition("{content}")
+    placeholders = {
+        "title": escape_html(title),
+        "summary": escape_html(summary),
+        "session_id": escape_html(session_id),
+        "short_id": escape_html(session_id[:8] if session_id else "session"),
+        "project_dir": escape_html(project_dir),
+        "created": created,
+        "timestamp": formatted_timestamp,
+        "stats_section": stats_html,
+    }
+    head = HTML_PLACEHOLDER_RE.sub(lambda m: placeholders[m.group(1)], head)
+
+    return iter_html_document(head, content_parts, tail)
+
 
-    return result
+def iter_html_document(head, content_parts, tail):
+    yield head
+    yield from content_parts
+    yield tail
 
 
 def render_markdown(meta, events, jsonl_path):
@@ -1048,48 +1268,73 @@ def render_markdown(meta, events, jsonl_path):
     lines.append("")
 
     for ev in events:
-        if ev["kind"] == "message":
-            role = ev.get("role", "unknown")
-            ts = ev.get("ts") or ""
-            lines.append(f"## {role} {ts}")
-            lines.append("")
-            lines.append(ev.get("text", ""))
-            lines.append("")
-        elif ev["kind"] == "tool_call":
-            name = ev.get("name", "unknown")
-            ts = ev.get("ts") or ""
-            lines.append(f"### tool_call {name} {ts}")
-            lines.append("")
-            lines.append("```json")
-            lines.append(ev.get("args", ""))
-            lines.append("```")
-            lines.append("")
-        elif ev["kind"] == "tool_output":
-            ts = ev.get("ts") or ""
-            lines.append(f"### tool_output {ts}")
-            lines.append("")
-            lines.append("```")
-            lines.append(ev.get("output", ""))
-            lines.append("```")
-            lines.append("")
-
-    return "\n".join(lines).strip() + "\n"
+        kind = ev["kind"]
+        if kind == "message":
+            lines.append(MD_MESSAGE_TEMPLATE.format(
+                role=ev.get("role", "unknown"), ts=ev.get("ts") or "", text=ev.get("text", "")
+            ))
+        elif kind == "tool_call":
+            lines.append(MD_TOOL_CALL_TEMPLATE.format(
+                name=ev.get("name", "unknown"), ts=ev.get("ts") or "", args=ev.get("args", "")
+            ))
+        elif kind == "tool_output":
+            lines.append(MD_TOOL_OUTPUT_TEMPLATE.format(
+                ts=ev.get("ts") or "", output=ev.get("output", "")
+            ))
+
+    # Trim trailing whitespace from the last blocks before joining so the join
+    # builds the final string directly instead of strip() and + copying it again
+    while not lines[-1].strip():
+        lines.pop()
+    lines[-1] = lines[-1].rstrip()
+    lines.append("")
+    return "\n".join(lines)
+
+
+def iter_session_files(root):
+    # Walk the sessions tree with os.scandir, skipping hidden entries as
+    # glob's "**" did, and yield the DirEntry of every .jsonl file
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".jsonl"):
+                    yield entry
+
+
+def newest_session_path(entries):
+    # Track the most recently modified entry in one pass, one stat() each
+    best_path = None
+    best_mtime = None
+    for entry in entries:
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        if best_mtime is None or mtime > best_mtime:
+            best_path = entry.path
+            best_mtime = mtime
+    return best_path
 
 
 def find_latest_session(root):
-    pattern = os.path.join(root, "**", "rollout-*.jsonl")
-    candidates = glob.glob(pattern, recursive=True)
-    if not candidates:
-        return None
-    return max(candidates, key=os.path.getmtime)
+    return newest_session_path(
+        entry for entry in iter_session_files(root) if entry.name.startswith("rollout-")
+    )
 
 
 def find_session_by_id(root, session_id):
-    pattern = os.path.join(root, "**", f"*{session_id}*.jsonl")
-    matches = glob.glob(pattern, recursive=True)
-    if not matches:
-        return None
-    return max(matches, key=os.path.getmtime)
+    return newest_session_path(
+        entry for entry in iter_session_files(root) if session_id in entry.name
+    )
 
 
 def get_output_directory(project_dir, config):
@@ -1102,12 +1347,12 @@ def get_output_directory(project_dir, config):
     return Path(project_dir) / output_subdir
 
 
-def build_output_path(output_dir, session_id, started_at, ext):
+def build_output_path(output_dir, session_id, started_at, ext, now=None):
     output_dir.mkdir(parents=True, exist_ok=True)
     if started_at:
-        ts = datetime.fromisoformat(started_at.replace("Z", "+00:00")).strftime("%Y%m%dT%H%M%SZ")
+        ts = parse_iso_timestamp(started_at).strftime("%Y%m%dT%H%M%SZ")
     else:
-        ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        ts = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
     filename = f"{ts}_{session_id}.{ext}" if session_id else f"{ts}_session.{ext}"
     return output_dir / filename
 
@@ -1135,7 +1380,8 @@ def main():
         print("No session file found.")
         return 1
 
-    meta, events, conversation, token_totals = parse_session(session_path, config)
+    parsed = parse_session(session_path, config)
+    meta, events, conversation, token_totals = parsed
     session_id = meta.get("id")
     cwd = meta.get("cwd") or os.getcwd()
 
@@ -1143,18 +1389,21 @@ def main():
     output_format = args.format or os.getenv("CODEX_EXPORT_FORMAT") or "both"
 
     written = []
+    # One export time for every output, so the .md and .html of a session
+    # without a start time get the same filename stamp
+    now = datetime.now(timezone.utc)
 
     if output_format in ("md", "both"):
-        md_path = build_output_path(output_dir, session_id, meta.get("timestamp"), "md")
+        md_path = build_output_path(output_dir, session_id, meta.get("timestamp"), "md", now)
         with open(md_path, "w", encoding="utf-8") as f:
             f.write(render_markdown(meta, events, session_path))
         written.append(str(md_path))
 
     if output_format in ("html", "both"):
-        html_content = convert_to_html(session_path, cwd, session_id, config)
-        html_path = build_output_path(output_dir, session_id, meta.get("timestamp"), "html")
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
+        html_parts = convert_to_html(session_path, cwd, session_id, config, parsed, now)
+        html_path = build_output_path(output_dir, session_id, meta.get("timestamp"), "html", now)
+        with open(html_path, "wb", buffering=HTML_WRITE_BUFFER_SIZE) as f:
+            f.writelines(part.encode("utf-8") for part in html_parts)
         written.append(str(html_path))
 
     for path in written:
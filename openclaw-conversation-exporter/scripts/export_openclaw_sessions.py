@@ -9,18 +9,33 @@ Usage:
     openclaw-export --since 2026-02-10  # Export since date
 """
 
+import html
+import io
 import json
 import os
 import sys
 import glob
+import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache
+from itertools import chain, repeat
 from pathlib import Path
 from datetime import datetime, timedelta
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 OPENCLAW_DIR = Path.home() / ".openclaw"
 EXPORTER = Path.home() / "ai-conversation-exporters" / "claude-conversation-exporter" / "export-conversation.py"
 EXPORT_DIR = Path.home() / "openclaw-export"
 CONFIG_PATH = Path.home() / ".claude" / "conversation-export-config.json"
+# Session logs run to megabytes; read them in large chunks to cut read() calls
+JSONL_READ_BUFFER_SIZE = 1024 * 1024
 
 
 def ensure_config():
@@ -45,30 +60,52 @@ def ensure_config():
         print(f"Created config at {CONFIG_PATH}")
 
 
-def parse_openclaw_session(filepath):
-    """Parse OpenClaw JSONL into Claude Code compatible message list."""
-    messages = []
-    session_id = Path(filepath).stem
-    project_path = str(Path(filepath).parent.parent.parent)
-    agent_name = Path(filepath).parent.parent.name
+def stream_openclaw_session(filepath):
+    """Parse OpenClaw JSONL lazily; messages are yielded as the file is read."""
+    session_data = {
+        "session_id": Path(filepath).stem,
+        "agent": Path(filepath).parent.parent.name,
+        "project_path": str(Path(filepath).parent.parent.parent),
+        "messages": None,
+        "first_timestamp": None,
+        "last_timestamp": None,
+    }
+    session_data["messages"] = iter_openclaw_messages(filepath, session_data)
+    return session_data
+
+
+def iter_openclaw_messages(filepath, session_data):
+    """Yield Claude Code compatible messages, recording timestamps in session_data."""
     first_ts = None
-    last_ts = None
 
-    with open(filepath) as f:
+    # Read raw bytes; both parsers decode UTF-8 themselves
+    with open(filepath, "rb", buffering=JSONL_READ_BUFFER_SIZE) as f:
         for line in f:
+            # Only "session" and "message" entries are used, so skip anything
+            # that cannot be one of them before paying for a JSON parse. This is
+            # a byte heuristic: a type spelled with \u escapes would be missed
+            if b'"message"' not in line and b'"session"' not in line:
+                continue
             line = line.strip()
-            if not line:
+            # Entries are JSON objects; anything else is skipped unparsed
+            if line[:1] != b"{":
                 continue
             try:
-                entry = json.loads(line)
-            except:
+                entry = json_loads(line)
+            except Exception:
+                # orjson is stricter than json (NaN, lone surrogates), so retry
+                # with the standard parser before dropping the line
+                try:
+                    entry = json.loads(line)
+                except:
+                    continue
+
+            kind = entry.get("type")
+            if kind == "session":
+                first_ts = session_data["first_timestamp"] = entry.get("timestamp")
                 continue
 
-            if entry.get("type") == "session":
-                first_ts = entry.get("timestamp")
-                continue
-
-            if entry.get("type") != "message":
+            if kind != "message":
                 continue
 
             msg = entry.get("message", {})
@@ -76,23 +113,16 @@ def parse_openclaw_session(filepath):
             content = msg.get("content")
             ts = entry.get("timestamp", "")
             if ts:
-                last_ts = ts
+                session_data["last_timestamp"] = ts
 
             if not first_ts and ts:
-                first_ts = ts
+                first_ts = session_data["first_timestamp"] = ts
 
-            if not role or not content:
+            if not role or not content or not isinstance(content, (str, list)):
                 continue
 
             # Convert to Claude Code format
-            claude_msg = {"role": role}
-
-            if isinstance(content, str):
-                claude_msg["content"] = content
-            elif isinstance(content, list):
-                claude_msg["content"] = content
-            else:
-                continue
+            claude_msg = {"role": role, "content": content}
 
             # Add usage info if present
             usage = msg.get("usage", {})
@@ -103,21 +133,14 @@ def parse_openclaw_session(filepath):
             if model:
                 claude_msg["model"] = model
 
-            messages.append(claude_msg)
-
-    return {
-        "session_id": session_id,
-        "agent": agent_name,
-        "project_path": project_path,
-        "messages": messages,
-        "first_timestamp": first_ts,
-        "last_timestamp": last_ts,
-    }
+            yield claude_msg
 
 
 def export_session(session_data, export_dir):
     """Export a parsed session to HTML."""
-    if not session_data["messages"]:
+    messages = iter(session_data["messages"])
+    first = next(messages, None)
+    if first is None:
         return False
 
     agent = session_data["agent"]
@@ -125,65 +148,26 @@ def export_session(session_data, export_dir):
     out_dir = export_dir / agent
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    write_simple_html(session_data, out_dir / f"{sid}.html")
+    write_simple_html(session_data, out_dir / f"{sid}.html", chain((first,), messages))
     print(f"  ✅ {agent}/{sid[:8]}...")
     return True
 
 
-def write_simple_html(session_data, output_path):
-    """Write a self-contained HTML export."""
-    import html as html_mod
+def export_session_file(filepath, export_dir):
+    """Parse and export one session file in a worker, returning its output too."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        exported = export_session(stream_openclaw_session(filepath), export_dir)
+    return exported, output.getvalue()
 
-    agent = session_data["agent"]
-    sid = session_data["session_id"]
-    first_ts = session_data.get("first_timestamp", "")
-    messages = session_data["messages"]
-
-    user_count = sum(1 for m in messages if m["role"] == "user")
-    asst_count = sum(1 for m in messages if m["role"] == "assistant")
-
-    msg_html = []
-    for msg in messages:
-        role = msg["role"]
-        content = msg.get("content", "")
-        
-        if isinstance(content, list):
-            text_parts = []
-            tool_parts = []
-            for part in content:
-                if isinstance(part, dict):
-                    if part.get("type") == "text":
-                        text_parts.append(part.get("text", ""))
-                    elif part.get("type") == "toolCall":
-                        tool_parts.append(f'<details><summary>🔧 {part.get("name", "tool")}()</summary><pre>{html_mod.escape(json.dumps(part.get("arguments", {}), indent=2)[:500])}</pre></details>')
-                    elif part.get("type") == "tool_use":
-                        tool_parts.append(f'<details><summary>🔧 {part.get("name", "tool")}()</summary><pre>{html_mod.escape(json.dumps(part.get("input", {}), indent=2)[:500])}</pre></details>')
-                    elif part.get("type") == "tool_result":
-                        text_parts.append(f"[tool result: {str(part.get('content', ''))[:200]}]")
-            content = "\n".join(text_parts)
-            if tool_parts:
-                content += "\n" + "\n".join(tool_parts)
-        
-        if not isinstance(content, str):
-            content = str(content)
-
-        escaped = html_mod.escape(content).replace("\n", "<br>")
-        role_class = "user" if role == "user" else "assistant"
-        emoji = "👤" if role == "user" else "🤖"
-        name = "Jagannath" if role == "user" else "OpenClaw"
-        
-        msg_html.append(f'''
-        <div class="message {role_class}">
-            <div class="role">{emoji} {name}</div>
-            <div class="content">{escaped}</div>
-        </div>''')
-
-    html_content = f'''<!DOCTYPE html>
+
+# Page shell for write_simple_html; messages are written between the two halves
+HTML_HEADER_TEMPLATE = '''<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>OpenClaw — {agent}/{sid[:8]}</title>
+<title>OpenClaw — {agent}/{short_sid}</title>
 <style>
 :root {{ --bg: #1a1b26; --fg: #c0caf5; --user-bg: #24283b; --asst-bg: #1a1b26; --accent: #7aa2f7; --border: #3b4261; }}
 @media (prefers-color-scheme: light) {{ :root {{ --bg: #fff; --fg: #24283b; --user-bg: #f0f0f5; --asst-bg: #fff; --accent: #2e7de9; --border: #ddd; }} }}
@@ -206,14 +190,131 @@ pre {{ background: #0d0d0d; padding: 0.5rem; border-radius: 4px; overflow-x: aut
 <body>
 <div class="header">
     <h1>🤖 OpenClaw — {agent}</h1>
-    <div class="stats">Session: {sid[:8]}... | Started: {first_ts[:19] if first_ts else 'unknown'} | {user_count} user + {asst_count} assistant messages</div>
+    <div class="stats">Session: {short_sid}... | Started: {started} | {user_count} user + {asst_count} assistant messages</div>
 </div>
-{"".join(msg_html)}
+'''
+HTML_FOOTER = '''
 </body>
 </html>'''
-
-    with open(output_path, 'w') as f:
-        f.write(html_content)
+# Static markup around each message's escaped content, per role
+USER_MESSAGE_PREFIX = '''
+        <div class="message user">
+            <div class="role">👤 Jagannath</div>
+            <div class="content">'''
+ASSISTANT_MESSAGE_PREFIX = '''
+        <div class="message assistant">
+            <div class="role">🤖 OpenClaw</div>
+            <div class="content">'''
+MESSAGE_SUFFIX = '''</div>
+        </div>'''
+# Rendered message HTML is held in memory, as encoded UTF-8, up to this many
+# bytes (1 MiB) before write_simple_html spills it to a temporary file
+HTML_SPOOL_MAX_SIZE = 1024 * 1024
+# Exports of long sessions run to megabytes, so write them through a larger
+# buffer to keep the number of write() syscalls down
+HTML_WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+# Tool arguments whose keys and values total less than this many characters
+# (ls, git status, ...) are dumped through a cache; large Write/Edit bodies
+# are dumped directly so the cache never keeps them alive
+TOOL_ARGUMENTS_CACHE_MAX_LENGTH = 256
+
+
+@lru_cache(maxsize=1024)
+def dump_str_tool_arguments(items):
+    """Cached dump_tool_arguments for arguments whose values are all strings."""
+    return json.dumps(dict(items), indent=2)[:500]
+
+
+def dump_tool_arguments(args):
+    """Pretty-print tool call arguments, truncated to 500 characters."""
+    # Sessions repeat the same small calls over and over. Only all-string
+    # arguments are cached: as keys, True == 1 == 1.0 would otherwise share
+    # one rendering
+    if isinstance(args, dict):
+        size = 0
+        for key, value in args.items():
+            if type(value) is not str:
+                break
+            size += len(key) + len(value)
+            if size >= TOOL_ARGUMENTS_CACHE_MAX_LENGTH:
+                break
+        else:
+            return dump_str_tool_arguments(tuple(args.items()))
+    return json.dumps(args, indent=2)[:500]
+
+
+def render_message_html(msg):
+    """Render one message as an HTML fragment, or '' if it has nothing to show."""
+    role = msg["role"]
+    content = msg.get("content", "")
+    if not content:
+        return ""
+
+    if isinstance(content, list):
+        text_parts = []
+        tool_parts = []
+        for part in content:
+            if isinstance(part, dict):
+                if part.get("type") == "text":
+                    text_parts.append(part.get("text", ""))
+                elif part.get("type") == "toolCall":
+                    tool_parts.append(f'<details><summary>🔧 {part.get("name", "tool")}()</summary><pre>{html.escape(dump_tool_arguments(part.get("arguments", {})))}</pre></details>')
+                elif part.get("type") == "tool_use":
+                    tool_parts.append(f'<details><summary>🔧 {part.get("name", "tool")}()</summary><pre>{html.escape(dump_tool_arguments(part.get("input", {})))}</pre></details>')
+                elif part.get("type") == "tool_result":
+                    text_parts.append(f"[tool result: {str(part.get('content', ''))[:200]}]")
+        content = "\n".join(text_parts)
+        if tool_parts:
+            content += "\n" + "\n".join(tool_parts)
+    
+    if not isinstance(content, str):
+        content = str(content)
+    if not content.strip():
+        return ""
+
+    prefix = USER_MESSAGE_PREFIX if role == "user" else ASSISTANT_MESSAGE_PREFIX
+    return prefix + html.escape(content).replace("\n", "<br>") + MESSAGE_SUFFIX
+
+
+def write_simple_html(session_data, output_path, messages=None):
+    """Write a self-contained HTML export, one message at a time."""
+    agent = session_data["agent"]
+    sid = session_data["session_id"]
+    if messages is None:
+        messages = session_data["messages"]
+
+    # The header needs the message counts and start time, which are only final
+    # once every message has been read, so the body is spooled first
+    user_count = 0
+    asst_count = 0
+    with tempfile.SpooledTemporaryFile(max_size=HTML_SPOOL_MAX_SIZE) as body:
+        for msg in messages:
+            role = msg["role"]
+            if role == "user":
+                user_count += 1
+            elif role == "assistant":
+                asst_count += 1
+            fragment = render_message_html(msg)
+            if fragment:
+                body.write(fragment.encode('utf-8'))
+
+        first_ts = session_data.get("first_timestamp", "")
+        header = HTML_HEADER_TEMPLATE.format(
+            agent=agent,
+            short_sid=sid[:8],
+            started=first_ts[:19] if first_ts else 'unknown',
+            user_count=user_count,
+            asst_count=asst_count,
+        )
+
+        body.seek(0)
+        # Encode straight to UTF-8, the charset the page declares
+        with open(output_path, 'wb', buffering=HTML_WRITE_BUFFER_SIZE) as f:
+            f.write(header.encode('utf-8'))
+            shutil.copyfileobj(body, f)
+            f.write(HTML_FOOTER.encode('utf-8'))
 
 
 def main():
@@ -222,6 +323,8 @@ def main():
     parser.add_argument("--since", help="Export sessions since date (YYYY-MM-DD or 'today')")
     parser.add_argument("--agent", help="Filter by agent name")
     parser.add_argument("--output", help="Output directory", default=str(EXPORT_DIR))
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Number of sessions to export in parallel (default: CPU count)")
     args = parser.parse_args()
 
     export_dir = Path(args.output)
@@ -236,35 +339,35 @@ def main():
 
     ensure_config()
 
-    # Find all session files
-    patterns = [str(OPENCLAW_DIR / "agents" / "*" / "sessions" / "*.jsonl")]
-    session_files = []
-    for pattern in patterns:
-        session_files.extend(glob.glob(pattern))
-
-    # Filter by date if specified
-    if since_dt:
-        filtered = []
-        for f in session_files:
-            mtime = datetime.fromtimestamp(os.path.getmtime(f))
-            if mtime >= since_dt:
-                filtered.append(f)
-        session_files = filtered
-
-    # Filter by agent if specified
-    if args.agent:
-        session_files = [f for f in session_files if args.agent in f]
-
-    # Exclude topic files (compaction artifacts)
-    session_files = [f for f in session_files if "-topic-" not in f]
+    def keep(f):
+        """Apply the filters cheapest-first so rejected files are never stat()ed."""
+        # Exclude topic files (compaction artifacts)
+        if "-topic-" in f:
+            return False
+        if args.agent and args.agent not in f:
+            return False
+        if since_dt and datetime.fromtimestamp(os.path.getmtime(f)) < since_dt:
+            return False
+        return True
+
+    # Find all session files, filtering them as the glob yields them
+    pattern = str(OPENCLAW_DIR / "agents" / "*" / "sessions" / "*.jsonl")
+    session_files = [f for f in glob.iglob(pattern) if keep(f)]
 
     print(f"📦 Exporting {len(session_files)} sessions to {export_dir}")
 
+    # Each session exports independently, so run them in a process pool and
+    # print their output in sorted order as results come back
+    session_files.sort()
+    max_workers = max(1, min(args.jobs or os.cpu_count() or 1, len(session_files)))
     exported = 0
-    for filepath in sorted(session_files):
-        session_data = parse_openclaw_session(filepath)
-        if export_session(session_data, export_dir):
-            exported += 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(export_session_file, session_files, repeat(export_dir))
+        for session_exported, output in results:
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            if session_exported:
+                exported += 1
 
     print(f"\n✅ Exported {exported} sessions to {export_dir}")
 